@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.database import load_from_database, check_db_exists, initialize_database
+from utils.database import load_from_database, initialize_database
 from utils.account_balance import get_account_balances, update_account_balance, get_total_balance
 
 st.set_page_config(
@@ -19,9 +19,11 @@ def main():
     if 'db_path' not in st.session_state:
         st.session_state.db_path = 'finance_data.db'
     
-    # Initialize database if it doesn't exist
-    if not check_db_exists(st.session_state.db_path):
+    # Initialize the database once per session; the schema setup is idempotent, so this
+    # also adds tables, indexes and settings that older databases are missing
+    if not st.session_state.get('db_initialized'):
         initialize_database(st.session_state.db_path)
+        st.session_state.db_initialized = True
     
     # Title and description
     st.title("Dashboard")
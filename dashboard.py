@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
-import os
-import uuid
-from utils.database import load_from_database, check_db_exists, initialize_database, save_to_database
+import hashlib
+from utils.database import load_from_database, initialize_database, save_to_database, get_db_mtime
 from utils.account_balance import get_account_balances, update_account_balance, get_total_balance
 from utils.data_import import import_statement, detect_source_from_header, read_file_to_preview, detect_file_type
 from utils.categorization import categorize_transactions, normalize_transaction_signs
@@ -14,6 +13,48 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_transactions(db_path, mtime):
+    transactions = load_from_database(db_path)
+    
+    # Low-cardinality text columns are sent to the browser as dictionary-encoded categoricals
+    transactions['category'] = transactions['category'].astype('category')
+    transactions['source'] = transactions['source'].astype('category')
+    return transactions
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_months(db_path, mtime):
+    # Month of every transaction, computed once per database version; comparing
+    # periods is an integer comparison instead of a strftime per row on every rerun
+    return _cached_transactions(db_path, mtime)['date'].dt.to_period('M')
+
+def _upload_digest(uploaded_file):
+    # Content hash of an upload; re-uploading the same statement gives the same key
+    return hashlib.blake2b(uploaded_file.getvalue(), digest_size=8).hexdigest()
+
+# The upload helpers below are keyed on the upload's content digest; the file object
+# itself is passed unhashed (leading underscore), so widget changes on the import
+# form and repeat uploads of the same file don't re-parse the workbook
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_detect_source(digest, _uploaded_file):
+    return detect_source_from_header(_uploaded_file)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_sheet_names(digest, _uploaded_file):
+    _uploaded_file.seek(0)
+    return pd.ExcelFile(_uploaded_file).sheet_names
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_preview(digest, sheet_name, _uploaded_file):
+    return read_file_to_preview(_uploaded_file, sheet_name=sheet_name)
+
+# Display formats for the transaction tables; the frontend formats the numeric
+# columns, so nothing is converted to strings row by row in Python
+_TRANSACTION_COLUMN_CONFIG = {
+    'date': st.column_config.DateColumn(format="YYYY-MM-DD"),
+    'amount': st.column_config.NumberColumn(format="dollar")
+}
+
 def main():
     # Initialize session state for storing data across pages
     if 'transactions' not in st.session_state:
@@ -22,15 +63,18 @@ def main():
     if 'db_path' not in st.session_state:
         st.session_state.db_path = 'finance_data.db'
     
-    # Initialize database if it doesn't exist
-    if not check_db_exists(st.session_state.db_path):
+    # Initialize the database once per session; the schema setup is idempotent, so this
+    # also adds tables, indexes and settings that older databases are missing
+    if not st.session_state.get('db_initialized'):
         initialize_database(st.session_state.db_path)
+        st.session_state.db_initialized = True
     
     # Title only, no subtitle text
     st.title("Dashboard")
     
     # Load transactions from database
-    transactions = load_from_database(st.session_state.db_path)
+    mtime = get_db_mtime(st.session_state.db_path)
+    transactions = _cached_transactions(st.session_state.db_path, mtime)
     st.session_state.transactions = transactions
     
     # Display key financial metrics at the top
@@ -63,13 +107,14 @@ def main():
         
         # Calculate monthly change
         # Get current and previous month data
-        current_month = pd.Timestamp.now().strftime('%Y-%m')
-        current_month_mask = transactions['date'].dt.strftime('%Y-%m') == current_month
+        months = _cached_months(st.session_state.db_path, mtime)
+        current_month = pd.Timestamp.now().to_period('M')
+        current_month_mask = months == current_month
         current_month_net = transactions[current_month_mask]['amount'].sum()
         
         # Get previous month - approximating as 1 month before current
-        prev_month = (pd.Timestamp.now() - pd.DateOffset(months=1)).strftime('%Y-%m')
-        prev_month_mask = transactions['date'].dt.strftime('%Y-%m') == prev_month
+        prev_month = current_month - 1
+        prev_month_mask = months == prev_month
         prev_month_net = transactions[prev_month_mask]['amount'].sum()
         
         # Calculate percent change if previous month had transactions
@@ -152,11 +197,11 @@ def main():
         st.subheader("Recent Transactions")
         if not transactions.empty:
             recent = transactions.sort_values('date', ascending=False).head(5)
-            # Format the dataframe for display - using .loc to avoid SettingWithCopyWarning
-            recent_display = recent[['date', 'description', 'amount', 'category']].copy()
-            recent_display.loc[:, 'date'] = recent_display['date'].dt.strftime('%Y-%m-%d')
-            recent_display.loc[:, 'amount'] = recent_display['amount'].map('${:,.2f}'.format)
-            st.dataframe(recent_display, use_container_width=True)
+            st.dataframe(
+                recent[['date', 'description', 'amount', 'category']],
+                use_container_width=True,
+                column_config=_TRANSACTION_COLUMN_CONFIG
+            )
         else:
             st.info("No transactions found. Import your financial data to get started.")
     
@@ -169,8 +214,7 @@ def main():
             balance = total_income - total_expenses
             
             # Current month stats
-            current_month = pd.Timestamp.now().strftime('%Y-%m')
-            current_month_mask = transactions['date'].dt.strftime('%Y-%m') == current_month
+            current_month_mask = _cached_months(st.session_state.db_path, mtime) == pd.Timestamp.now().to_period('M')
             current_month_expenses = abs(transactions[current_month_mask & (transactions['amount'] < 0)]['amount'].sum())
             current_month_income = transactions[current_month_mask & (transactions['amount'] > 0)]['amount'].sum()
             
@@ -192,15 +236,6 @@ def main():
     # Import Data section
     st.subheader("Import Data")
     
-    # Create temp_uploads directory if it doesn't exist
-    if not os.path.exists('temp_uploads'):
-        os.makedirs('temp_uploads', exist_ok=True)
-        # Set permissions to ensure we can write files
-        try:
-            os.chmod('temp_uploads', 0o777)
-        except:
-            pass
-    
     # Import Data functionality
     with st.expander("Import your financial statements"):
         # Instructions
@@ -219,20 +254,13 @@ def main():
         # File upload - Excel only
         uploaded_file = st.file_uploader("Upload statement file", type=["xlsx", "xls"])
         
-        # Initialize temp_file_path outside of try/except blocks to avoid unbound variable issues
-        temp_file_path = None
-        
         if uploaded_file is not None:
             try:
-                # Save uploaded file temporarily
-                # Generate a unique ID to avoid name conflicts
-                unique_id = uuid.uuid4().hex
-                temp_file_path = f"temp_uploads/{unique_id}_{uploaded_file.name}"
-                with open(temp_file_path, "wb") as temp_file:
-                    temp_file.write(uploaded_file.getvalue())
+                # The upload is already in memory, so the parsers read it directly
+                # instead of from a temporary copy on disk
                 
                 # Verify it's an Excel file
-                file_type = detect_file_type(temp_file_path)
+                file_type = detect_file_type(uploaded_file)
                 
                 if file_type not in ['xlsx', 'xls']:
                     st.error("Unsupported file format. Please upload an Excel (XLSX/XLS) file.")
@@ -241,7 +269,8 @@ def main():
                     st.info("Excel file detected. The system will extract transactions from the Excel data.")
                     
                     # Try to detect source from content
-                    detected_source = detect_source_from_header(temp_file_path)
+                    upload_digest = _upload_digest(uploaded_file)
+                    detected_source = _cached_detect_source(upload_digest, uploaded_file)
                     
                     # Source selection
                     source_options = ['wells_fargo', 'chase', 'bank_of_america', 'apple_pay', 'schwab']
@@ -256,8 +285,7 @@ def main():
                     
                     try:
                         # Get list of sheet names
-                        excel_file = pd.ExcelFile(temp_file_path)
-                        all_sheets = excel_file.sheet_names
+                        all_sheets = _cached_sheet_names(upload_digest, uploaded_file)
                         
                         if len(all_sheets) > 1:
                             sheet_name = st.selectbox("Select sheet with transaction data:", all_sheets)
@@ -268,7 +296,7 @@ def main():
                         # Show preview of the file with selected sheet
                         st.subheader("File Preview")
                         with st.spinner("Generating preview..."):
-                            preview = read_file_to_preview(temp_file_path, sheet_name=sheet_name)
+                            preview = _cached_preview(upload_digest, sheet_name, uploaded_file)
                             st.dataframe(preview)
                     except Exception as e:
                         st.error(f"Error reading Excel file: {str(e)}")
@@ -278,7 +306,7 @@ def main():
                         with st.spinner("Importing and processing data..."):
                             try:
                                 # Import, categorize, and save to database
-                                df = import_statement(temp_file_path, selected_source, sheet_name=sheet_name)
+                                df = import_statement(uploaded_file, selected_source, sheet_name=sheet_name)
                                 
                                 if df.empty:
                                     st.error("No transactions were found in the file. Please check the file format and try again.")
@@ -295,11 +323,10 @@ def main():
                                     
                                     # Preview categorized data
                                     st.subheader("Categorized Transactions")
-                                    # Format date for display
-                                    display_df = df.copy()
-                                    display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-                                    display_df['amount'] = display_df['amount'].map('${:,.2f}'.format)
-                                    st.dataframe(display_df[['date', 'description', 'amount', 'category']])
+                                    st.dataframe(
+                                        df[['date', 'description', 'amount', 'category']],
+                                        column_config=_TRANSACTION_COLUMN_CONFIG
+                                    )
                                     
                                     # Save to database
                                     success = save_to_database(df, st.session_state.db_path)
@@ -307,36 +334,30 @@ def main():
                                     if success:
                                         st.success("Data successfully imported and saved to database")
                                         # Update transactions in session state
-                                        st.session_state.transactions = load_from_database(st.session_state.db_path)
+                                        st.session_state.transactions = _cached_transactions(
+                                            st.session_state.db_path, get_db_mtime(st.session_state.db_path)
+                                        )
                                         st.rerun()  # Refresh the page to show updated data
                                     else:
                                         st.error("Error saving data to database")
                             except Exception as e:
                                 st.error(f"Error during import: {str(e)}")
-                
-                # Clean up temporary file
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
             
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
                     
     # Option to view existing data
     with st.expander("View All Transactions"):
         if st.button("Show All Transactions"):
-            transactions = load_from_database(st.session_state.db_path)
+            transactions = _cached_transactions(st.session_state.db_path, get_db_mtime(st.session_state.db_path))
             
             if not transactions.empty:
                 st.write(f"Total transactions: {len(transactions)}")
                 
-                # Format for display
-                display_df = transactions.copy()
-                display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-                display_df['amount'] = display_df['amount'].map('${:,.2f}'.format)
-                
-                st.dataframe(display_df[['id', 'date', 'description', 'amount', 'category', 'source']])
+                st.dataframe(
+                    transactions[['id', 'date', 'description', 'amount', 'category', 'source']],
+                    column_config=_TRANSACTION_COLUMN_CONFIG
+                )
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.database import load_from_database, delete_transaction, update_transaction, delete_transactions_by_source, reindex_transactions_by_date
+import numpy as np
+import json
+from utils.database import load_from_database, get_transaction_count, delete_transaction, update_transaction_fields, delete_transactions_by_source, reindex_transactions_by_date, get_db_mtime
 from utils.categorization import get_category_list
 import datetime
 from st_aggrid import AgGrid, GridOptionsBuilder
@@ -17,88 +19,123 @@ st.title("Transaction View")
 if 'db_path' not in st.session_state:
     st.session_state.db_path = 'finance_data.db'
 
-def main():
-    # Load all transactions
-    transactions = load_from_database(st.session_state.db_path)
-    
-    if transactions.empty:
-        st.info("No transactions found. Import your financial data first.")
-        return
-    
-    # Date filter
-    st.sidebar.header("Filter Options")
-    
-    # Get min and max dates from transactions
-    min_date = transactions['date'].min().date()
-    max_date = transactions['date'].max().date()
-    
-    # Date range selector
-    start_date = st.sidebar.date_input("Start Date", min_date)
-    end_date = st.sidebar.date_input("End Date", max_date)
-    
-    # Convert to pandas datetime
-    start_date = pd.Timestamp(start_date)
-    end_date = pd.Timestamp(end_date)
-    
-    # Filter by date
-    filtered_transactions = transactions[(transactions['date'] >= start_date) & 
-                                       (transactions['date'] <= end_date)]
-    
-    # Category filter
-    categories = ['All Categories'] + sorted(filtered_transactions['category'].unique().tolist())
-    selected_category = st.sidebar.selectbox("Category", categories)
-    
-    if selected_category != 'All Categories':
-        filtered_transactions = filtered_transactions[filtered_transactions['category'] == selected_category]
-    
-    # Source filter
-    sources = ['All Sources'] + sorted(filtered_transactions['source'].unique().tolist())
-    selected_source = st.sidebar.selectbox("Source", sources)
-    
-    if selected_source != 'All Sources':
-        filtered_transactions = filtered_transactions[filtered_transactions['source'] == selected_source]
+@st.cache_data(show_spinner=False, max_entries=2)
+def _tx_count(db_path, mtime):
+    return get_transaction_count(db_path)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _load_tx(db_path, mtime):
+    # Sort newest first once here; the filters below keep this order.
+    # Indexed by id (keeping the column) so lookups by transaction ID are hashed.
+    df = load_from_database(db_path).sort_values('date', ascending=False).set_index('id', drop=False)
+    
+    # Low-cardinality text columns compare and dedupe much faster as categoricals
+    df['category'] = df['category'].astype('category')
+    df['source'] = df['source'].astype('category')
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _filter_options(db_path, mtime):
+    # Distinct categories and sources of the whole table, shared by every selectbox below
+    transactions = _load_tx(db_path, mtime)
+    all_cats = sorted(transactions['category'].dropna().unique().tolist())
+    all_srcs = sorted(transactions['source'].dropna().unique().tolist())
+    return all_cats, all_srcs
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _desc_casefold(db_path, mtime):
+    # Case-folded descriptions, so searches don't fold every row per keystroke; casefold
+    # matches the database search, which also handles non-ASCII text such as 'ß'
+    return _load_tx(db_path, mtime)['description'].str.casefold()
+
+@st.cache_data(show_spinner=False)
+def _grid_options(page_size):
+    # Both tables share one static column layout, so build it once per page size
+    # from an empty frame with the display dtypes instead of on every rerun
+    template = pd.DataFrame({'ID': pd.Series(dtype='int64')})
+    for col in ['date', 'description', 'amount', 'category', 'source']:
+        template[col] = pd.Series(dtype=object)
+    gb = GridOptionsBuilder.from_dataframe(template)
     
-    # Amount filter
-    # Use two separate number inputs instead of a slider to avoid step issues
-    st.sidebar.markdown("### Amount Range")
-    col1, col2 = st.sidebar.columns(2)
+    # Enable filtering for all columns
+    gb.configure_default_column(
+        filterable=True,
+        resizable=True,
+        sorteable=True,
+        editable=False
+    )
     
-    min_amount = float(transactions['amount'].min())
-    max_amount = float(transactions['amount'].max())
+    # Customize specific columns
+    gb.configure_column('ID', width=70)
+    gb.configure_column('date', width=110)
+    gb.configure_column('description', width=250, filter=True)
+    gb.configure_column('amount', width=110)
+    gb.configure_column('category', width=150, filter=True)
+    gb.configure_column('source', width=150, filter=True)
     
-    with col1:
-        amount_min = st.number_input("Min", value=min_amount, step=0.01)
+    # Configure pagination
+    gb.configure_pagination(enabled=True, paginationPageSize=page_size)
     
-    with col2:
-        amount_max = st.number_input("Max", value=max_amount, step=0.01)
+    # The builder returns nested defaultdicts that can't be pickled into the cache
+    return json.loads(json.dumps(gb.build()))
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _amount_signs(db_path, mtime):
+    # Positive and negative amount masks for the type filter; zero and NaN are in neither
+    a = _load_tx(db_path, mtime)['amount'].to_numpy()
+    return a > 0, a < 0
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _tx_stats(db_path, mtime):
+    # Date and amount bounds for the sidebar filter defaults
+    transactions = _load_tx(db_path, mtime)
+    return {
+        'dmin': transactions['date'].min().date(),
+        'dmax': transactions['date'].max().date(),
+        'amin': float(transactions['amount'].min()),
+        'amax': float(transactions['amount'].max()),
+    }
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _apply_filters(db_path, mtime, start_ns, end_ns, category, source, amount_min, amount_max, search_term):
+    # Combine every sidebar filter into one boolean mask over the full frame and gather once
+    transactions = _load_tx(db_path, mtime)
     
-    # Use the min/max values as our filter
-    amount_range = (amount_min, amount_max)
+    # int64 nanosecond view of the dates so the range filter is a plain integer compare
+    date_ts = transactions['date'].to_numpy(dtype='datetime64[ns]').view('i8')
+    amounts = transactions['amount'].to_numpy()
+    mask = (date_ts >= start_ns) & (date_ts <= end_ns)
+    mask &= (amounts >= amount_min) & (amounts <= amount_max)
     
-    filtered_transactions = filtered_transactions[
-        (filtered_transactions['amount'] >= amount_range[0]) & 
-        (filtered_transactions['amount'] <= amount_range[1])
-    ]
+    # Compare on the categorical Series (an integer code compare), then take the mask
+    if category != 'All Categories':
+        mask &= (transactions['category'] == category).to_numpy()
     
-    # Description search
-    search_term = st.sidebar.text_input("Search Description")
+    if source != 'All Sources':
+        mask &= (transactions['source'] == source).to_numpy()
     
     if search_term:
-        filtered_transactions = filtered_transactions[
-            filtered_transactions['description'].str.contains(search_term, case=False)
-        ]
-    
-    # Display filtered transactions
-    st.markdown(f"### Transactions ({len(filtered_transactions)} records)")
-    
-    # Sort by date
-    filtered_transactions = filtered_transactions.sort_values('date', ascending=False)
-    
-    # Create a copy of the dataframe for display with formatted columns
-    display_df = filtered_transactions.copy()
-    display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-    display_df['amount'] = display_df['amount'].map('${:,.2f}'.format)
+        mask &= _desc_casefold(db_path, mtime).str.contains(search_term.casefold(), regex=False, na=False).to_numpy()
     
+    return transactions.iloc[np.flatnonzero(mask)]
+
+def _changed_fields(transaction, category, description, amount, date):
+    # Diff the edit form against the stored row and keep only the fields that differ
+    desired = {'category': category, 'description': description,
+               'amount': amount, 'date': date.strftime('%Y-%m-%d')}
+    current = {'category': transaction['category'], 'description': transaction['description'],
+               'amount': float(transaction['amount']), 'date': transaction['date'].strftime('%Y-%m-%d')}
+    return {k: v for k, v in desired.items() if v != current[k]}
+
+def _format_amounts(amounts):
+    # One formatting pass per column. The main table passes only its visible page;
+    # the search grid pages on the client, so it formats the whole result set
+    return amounts.map('${:,.2f}'.format)
+
+# Pagination controls and the transaction table live in a fragment so that
+# paging reruns only this block instead of the whole page
+@st.fragment
+def render_page(filtered_transactions):
     # Pagination - use number input instead of slider to avoid step/value conflicts
     col_rows, col_pages = st.columns([1, 4])
     
@@ -125,17 +162,10 @@ def main():
     
     with col2:
         if total_pages > 1:
-            # Use radio buttons or selectbox instead of a slider
-            page_options = list(range(1, total_pages + 1))
-            page_index = page_options.index(st.session_state.current_page) if st.session_state.current_page in page_options else 0
-            
-            # Only show a select box if we have a reasonable number of pages
-            if total_pages <= 20:  
-                page_num = st.selectbox("Page", options=page_options, index=page_index)
-            else:
-                # For larger datasets, use number input with min/max constraints
-                page_num = st.number_input("Page", min_value=1, max_value=total_pages, 
-                                       value=st.session_state.current_page, step=1)
+            # Bounded number input avoids building a list of every page number on each rerun
+            current_page = min(max(st.session_state.current_page, 1), total_pages)
+            page_num = st.number_input("Page", min_value=1, max_value=total_pages, 
+                                   value=current_page, step=1)
             
             if int(page_num) != st.session_state.current_page:
                 set_page(int(page_num))
@@ -149,55 +179,21 @@ def main():
     start_idx = int((st.session_state.current_page - 1) * rows_per_page)
     end_idx = int(min(start_idx + rows_per_page, len(filtered_transactions)))
     
-    # Display paginated transactions
-    # Set the ID as the index but don't show it as a column
-    display_subset = display_df.iloc[start_idx:end_idx].copy()
-    
-    # Format amount with dollar sign for display if it's not already a string
-    if not pd.api.types.is_string_dtype(display_subset['amount']):
-        display_subset['amount'] = display_subset['amount'].apply(lambda x: f"${x:,.2f}")
+    # Slice the visible page first so only its rows are copied and formatted for display
+    display_subset = filtered_transactions.iloc[start_idx:end_idx].copy()
+    display_subset['date'] = display_subset['date'].dt.strftime('%Y-%m-%d')
+    display_subset['amount'] = _format_amounts(display_subset['amount'])
     
-    # Set index to ID
-    display_subset = display_subset.set_index('id')
-    display_subset.index.name = 'ID'  # Rename the index
-    
-    # Format date as string to avoid data type compatibility issues
-    display_subset_formatted = display_subset.copy()
-    # Convert date column to string if it's a datetime
-    if pd.api.types.is_datetime64_any_dtype(display_subset_formatted['date']):
-        display_subset_formatted['date'] = display_subset_formatted['date'].dt.strftime('%Y-%m-%d')
-    
-    # Reset index to make ID a column for AgGrid
-    display_subset = display_subset.reset_index()
+    # The frame is already indexed by id; expose it as the ID column for AgGrid
+    display_subset = display_subset.drop(columns='id').rename_axis('ID').reset_index()
     
     # Configure AgGrid options
-    gb = GridOptionsBuilder.from_dataframe(display_subset[['ID', 'date', 'description', 'amount', 'category', 'source']])
-    
-    # Enable filtering for all columns
-    gb.configure_default_column(
-        filterable=True,
-        resizable=True,
-        sorteable=True,
-        editable=False
-    )
-    
-    # Customize specific columns
-    gb.configure_column('ID', width=70)
-    gb.configure_column('date', width=110)
-    gb.configure_column('description', width=250, filter=True)
-    gb.configure_column('amount', width=110)
-    gb.configure_column('category', width=150, filter=True)
-    gb.configure_column('source', width=150, filter=True)
-    
-    # Configure pagination
-    gb.configure_pagination(enabled=True, paginationPageSize=rows_per_page)
-    
-    # Configure grid options
-    gridOptions = gb.build()
+    gridOptions = _grid_options(rows_per_page)
     
     # No info text as requested
     
-    # Create the AgGrid component
+    # Create the AgGrid component; nothing reads its return value, so sorting and
+    # filtering inside the grid should not trigger a rerun
     AgGrid(
         display_subset,
         gridOptions=gridOptions,
@@ -205,9 +201,91 @@ def main():
         height=400,
         enable_enterprise_modules=False,
         theme="streamlit",
-        allow_unsafe_jscode=True
+        allow_unsafe_jscode=True,
+        update_on=[],
+        key="main-grid"
+    )
+
+def main():
+    # Load all transactions (cached until the database file changes)
+    db_path = st.session_state.db_path
+    mtime = get_db_mtime(db_path)
+    
+    # Probe the row count first so an empty database never builds the full frame
+    if _tx_count(db_path, mtime) == 0:
+        st.info("No transactions found. Import your financial data first.")
+        return
+    
+    transactions = _load_tx(db_path, mtime)
+    
+    # Category options and their positions, looked up once per rerun
+    cats = get_category_list(db_path)
+    cats_index = {c: i for i, c in enumerate(cats)}
+    
+    # Distinct categories/sources for the filter selectboxes, cached with the data
+    all_cats, all_srcs = _filter_options(db_path, mtime)
+    
+    # Date filter
+    st.sidebar.header("Filter Options")
+    
+    # Min/max dates and amounts, cached with the data
+    stats = _tx_stats(db_path, mtime)
+    min_date = stats['dmin']
+    max_date = stats['dmax']
+    
+    # Filters live in a form so a series of edits causes a single rerun on Apply
+    with st.sidebar.form("filters"):
+        # Date range selector
+        start_date = st.date_input("Start Date", min_date)
+        end_date = st.date_input("End Date", max_date)
+        
+        # Convert to pandas datetime
+        start_date = pd.Timestamp(start_date)
+        end_date = pd.Timestamp(end_date)
+        
+        # Category filter
+        categories = ['All Categories'] + all_cats
+        selected_category = st.selectbox("Category", categories)
+        
+        # Source filter
+        sources = ['All Sources'] + all_srcs
+        selected_source = st.selectbox("Source", sources)
+        
+        # Amount filter
+        # Use two separate number inputs instead of a slider to avoid step issues
+        st.markdown("### Amount Range")
+        col1, col2 = st.columns(2)
+        
+        min_amount = stats['amin']
+        max_amount = stats['amax']
+        
+        with col1:
+            amount_min = st.number_input("Min", value=min_amount, step=0.01)
+        
+        with col2:
+            amount_max = st.number_input("Max", value=max_amount, step=0.01)
+        
+        # Use the min/max values as our filter
+        amount_range = (amount_min, amount_max)
+        
+        # Description search
+        search_term = st.text_input("Search Description")
+        
+        st.form_submit_button("Apply Filters")
+    
+    # Filtered rows are memoized on the filter values, so reruns that don't touch
+    # the sidebar (edit/delete inputs) skip the filter pass entirely
+    filtered_transactions = _apply_filters(
+        db_path, mtime, start_date.value, end_date.value,
+        selected_category, selected_source, amount_range[0], amount_range[1], search_term
     )
     
+    # Display filtered transactions
+    st.markdown(f"### Transactions ({len(filtered_transactions)} records)")
+    
+    # Paginated transaction table
+    render_page(filtered_transactions)
+    
     # Edit transaction section
     st.markdown("---")
     
@@ -226,10 +304,11 @@ def main():
         
             if edit_id:
                 # Find transaction in dataframe
-                transaction = transactions[transactions['id'] == edit_id]
+                transaction = transactions.loc[edit_id] if edit_id in transactions.index else None
                 
-                if not transaction.empty:
-                    transaction = transaction.iloc[0]
+                if transaction is not None:
+                    # Convert the row to a plain dict once for cheap repeated field access
+                    transaction = transaction.to_dict()
                     
                     st.write("**Current Values:**")
                     st.write(f"Date: {transaction['date'].strftime('%Y-%m-%d')}")
@@ -239,9 +318,8 @@ def main():
                     st.write(f"Source: {transaction['source']}")
                     
                     # Edit form
-                    edit_category = st.selectbox("New Category", get_category_list(), 
-                                                index=get_category_list().index(transaction['category']) 
-                                                if transaction['category'] in get_category_list() else 0)
+                    edit_category = st.selectbox("New Category", cats, 
+                                                index=cats_index.get(transaction['category'], 0))
                     edit_description = st.text_input("New Description", transaction['description'])
                     
                     # Amount section with sign toggle
@@ -274,21 +352,15 @@ def main():
                     st.info(f"Final amount: ${final_amount:.2f} ({'positive' if final_amount > 0 else 'negative'})")
                     
                     if st.button("Update Transaction", key="update_by_id"):
-                        # Update each field if changed
-                        if edit_category != transaction['category']:
-                            update_transaction(edit_id, 'category', edit_category, st.session_state.db_path)
-                        
-                        if edit_description != transaction['description']:
-                            update_transaction(edit_id, 'description', edit_description, st.session_state.db_path)
-                        
-                        if final_amount != float(transaction['amount']):
-                            update_transaction(edit_id, 'amount', final_amount, st.session_state.db_path)
-                        
-                        if pd.Timestamp(edit_date) != transaction['date'].date():
-                            update_transaction(edit_id, 'date', edit_date.strftime('%Y-%m-%d'), st.session_state.db_path)
+                        # Write only the fields that changed, in one UPDATE
+                        updates = _changed_fields(transaction, edit_category, edit_description, final_amount, edit_date)
                         
-                        st.success(f"Transaction {edit_id} updated successfully")
-                        st.rerun()
+                        if update_transaction_fields(edit_id, updates, st.session_state.db_path):
+                            st.success(f"Transaction {edit_id} updated successfully")
+                            _load_tx.clear()
+                            st.rerun()
+                        else:
+                            st.error("Error updating transaction")
                 else:
                     st.error(f"No transaction found with ID {edit_id}")
         
@@ -305,81 +377,66 @@ def main():
                 
             with search_col2:
                 search_category = st.selectbox("Filter by Category", 
-                                            ["All Categories"] + sorted(transactions['category'].unique().tolist()))
+                                            ["All Categories"] + all_cats)
                 
             # Additional search filters if needed
             search_col3, search_col4 = st.columns(2)
             
             with search_col3:
                 search_source = st.selectbox("Filter by Source", 
-                                           ["All Sources"] + sorted(transactions['source'].unique().tolist()))
+                                           ["All Sources"] + all_srcs)
                 
             with search_col4:
                 search_type = st.selectbox("Filter by Type", 
                                          ["All Types", "Income/Payment (Positive)", "Expense (Negative)"])
             
-            # Apply filters to find matching transactions
-            search_results = transactions.copy()
+            # The results grid and ID dropdown are only built once the user has asked for something
+            has_criteria = (bool(search_description) or search_category != "All Categories"
+                            or search_source != "All Sources" or search_type != "All Types")
+            
+            # Apply filters to find matching transactions as one mask over the full frame
+            search_mask = np.ones(len(transactions), dtype=bool)
             
             # Filter by description if provided
             if search_description:
-                search_results = search_results[
-                    search_results['description'].str.contains(search_description, case=False)
-                ]
+                search_mask &= _desc_casefold(db_path, mtime).str.contains(
+                    search_description.casefold(), regex=False, na=False
+                ).to_numpy()
                 
             # Filter by category if selected
             if search_category != "All Categories":
-                search_results = search_results[search_results['category'] == search_category]
+                search_mask &= (transactions['category'] == search_category).to_numpy()
                 
             # Filter by source if selected
             if search_source != "All Sources":
-                search_results = search_results[search_results['source'] == search_source]
+                search_mask &= (transactions['source'] == search_source).to_numpy()
                 
             # Filter by transaction type (positive/negative) if selected
             if search_type == "Income/Payment (Positive)":
-                search_results = search_results[search_results['amount'] > 0]
+                search_mask &= _amount_signs(db_path, mtime)[0]
             elif search_type == "Expense (Negative)":
-                search_results = search_results[search_results['amount'] < 0]
+                search_mask &= _amount_signs(db_path, mtime)[1]
+            
+            search_results = transactions.iloc[np.flatnonzero(search_mask)] if has_criteria else transactions.iloc[:0]
             
             # Display search results
-            if len(search_results) > 0:
+            if not has_criteria:
+                st.info("Enter a description or choose a filter to search transactions")
+            elif len(search_results) > 0:
                 st.write(f"Found {len(search_results)} matching transactions")
                 
-                # Create a copy for display formatting
-                display_results = search_results.copy()
-                display_results['date'] = display_results['date'].dt.strftime('%Y-%m-%d')
-                
-                # Format amount with dollar sign for display if it's not already a string
-                if not pd.api.types.is_string_dtype(display_results['amount']):
-                    display_results['amount'] = display_results['amount'].apply(lambda x: f"${x:,.2f}")
+                # Format date and amount (with dollar sign) for display; assign returns a
+                # new frame, so the cached transactions are never modified
+                display_results = search_results.assign(
+                    date=search_results['date'].dt.strftime('%Y-%m-%d'),
+                    amount=_format_amounts(search_results['amount'])
+                )
                 
                 # Rename id column to ID for AgGrid
                 display_results = display_results.rename(columns={'id': 'ID'})
                 
                 # Configure AgGrid options for search results
-                gb_search = GridOptionsBuilder.from_dataframe(display_results[['ID', 'date', 'description', 'amount', 'category', 'source']])
-                
-                # Enable filtering for all columns
-                gb_search.configure_default_column(
-                    filterable=True,
-                    resizable=True,
-                    sorteable=True,
-                    editable=False
-                )
-                
-                # Customize specific columns
-                gb_search.configure_column('ID', width=70)
-                gb_search.configure_column('date', width=110)
-                gb_search.configure_column('description', width=250, filter=True)
-                gb_search.configure_column('amount', width=110)
-                gb_search.configure_column('category', width=150, filter=True)
-                gb_search.configure_column('source', width=150, filter=True)
-                
-                # Configure pagination
-                gb_search.configure_pagination(enabled=True, paginationPageSize=10)
-                
-                # Configure grid options
-                gridOptions_search = gb_search.build()
+                gridOptions_search = _grid_options(10)
                 
                 # No info text as requested
                 
@@ -391,17 +448,25 @@ def main():
                     height=300,
                     enable_enterprise_modules=False,
                     theme="streamlit",
-                    allow_unsafe_jscode=True
+                    allow_unsafe_jscode=True,
+                    update_on=[],
+                    key="search-grid"
                 )
                 
+                # Dropdown labels built in one pass over the results
+                labels = {
+                    tid: f"ID {tid} - {desc[:40]}"
+                    for tid, desc in zip(search_results['id'].tolist(), search_results['description'].tolist())
+                }
+                
                 # Selection for which transaction to edit
                 selected_id = st.selectbox("Select Transaction ID to Edit", 
-                                         options=search_results['id'].tolist(),
-                                         format_func=lambda x: f"ID {x} - {search_results[search_results['id'] == x]['description'].values[0][:40]}")
+                                         options=list(labels),
+                                         format_func=labels.get)
                 
                 if selected_id:
                     # Get the selected transaction
-                    transaction = transactions[transactions['id'] == selected_id].iloc[0]
+                    transaction = transactions.loc[selected_id].to_dict()
                     
                     st.write("**Edit Selected Transaction:**")
                     st.write(f"Date: {transaction['date'].strftime('%Y-%m-%d')}")
@@ -409,9 +474,8 @@ def main():
                     st.write(f"Amount: ${transaction['amount']:.2f}")
                     
                     # Edit form for the selected transaction
-                    edit_category = st.selectbox("New Category", get_category_list(), 
-                                               index=get_category_list().index(transaction['category']) 
-                                               if transaction['category'] in get_category_list() else 0,
+                    edit_category = st.selectbox("New Category", cats, 
+                                               index=cats_index.get(transaction['category'], 0),
                                                key="search_edit_category")
                     edit_description = st.text_input("New Description", transaction['description'], key="search_edit_desc")
                     
@@ -444,21 +508,15 @@ def main():
                     st.info(f"Final amount: ${final_amount:.2f} ({'positive' if final_amount > 0 else 'negative'})")
                     
                     if st.button("Update Transaction", key="update_from_search"):
-                        # Update each field if changed
-                        if edit_category != transaction['category']:
-                            update_transaction(selected_id, 'category', edit_category, st.session_state.db_path)
-                        
-                        if edit_description != transaction['description']:
-                            update_transaction(selected_id, 'description', edit_description, st.session_state.db_path)
-                        
-                        if final_amount != float(transaction['amount']):
-                            update_transaction(selected_id, 'amount', final_amount, st.session_state.db_path)
-                        
-                        if pd.Timestamp(edit_date) != transaction['date'].date():
-                            update_transaction(selected_id, 'date', edit_date.strftime('%Y-%m-%d'), st.session_state.db_path)
+                        # Write only the fields that changed, in one UPDATE
+                        updates = _changed_fields(transaction, edit_category, edit_description, final_amount, edit_date)
                         
-                        st.success(f"Transaction {selected_id} updated successfully")
-                        st.rerun()
+                        if update_transaction_fields(selected_id, updates, st.session_state.db_path):
+                            st.success(f"Transaction {selected_id} updated successfully")
+                            _load_tx.clear()
+                            st.rerun()
+                        else:
+                            st.error("Error updating transaction")
             else:
                 st.info("No transactions found matching your search criteria")
     
@@ -470,10 +528,10 @@ def main():
         
         if delete_id:
             # Find transaction in dataframe
-            transaction = transactions[transactions['id'] == delete_id]
+            transaction = transactions.loc[delete_id] if delete_id in transactions.index else None
             
-            if not transaction.empty:
-                transaction = transaction.iloc[0]
+            if transaction is not None:
+                transaction = transaction.to_dict()
                 
                 st.write("**Transaction to Delete:**")
                 st.write(f"Date: {transaction['date'].strftime('%Y-%m-%d')}")
@@ -484,6 +542,7 @@ def main():
                 if st.button("Delete Transaction", key="delete_button"):
                     if delete_transaction(delete_id, st.session_state.db_path):
                         st.success(f"Transaction {delete_id} deleted successfully")
+                        _load_tx.clear()
                         st.rerun()
                     else:
                         st.error("Error deleting transaction")
@@ -494,13 +553,11 @@ def main():
         st.markdown("---")
         st.subheader("Bulk Delete by Source")
         
-        # Get unique sources for the dropdown
-        all_sources = sorted(transactions['source'].unique().tolist())
-        
-        if all_sources:
+        # Sources for the dropdown come from the cached filter options
+        if all_srcs:
             bulk_delete_source = st.selectbox(
                 "Select Source to Delete All Transactions From", 
-                all_sources,
+                all_srcs,
                 key="bulk_delete_source"
             )
             
@@ -515,6 +572,7 @@ def main():
                 count = delete_transactions_by_source(bulk_delete_source, st.session_state.db_path)
                 if count > 0:
                     st.success(f"Successfully deleted {count} transactions from {bulk_delete_source}")
+                    _load_tx.clear()
                     st.rerun()
                 else:
                     st.error(f"Error deleting transactions from {bulk_delete_source}")
@@ -537,6 +595,7 @@ def main():
         if st.button("Reindex All Transactions by Date") and confirm_reindex:
             if reindex_transactions_by_date(st.session_state.db_path):
                 st.success("Successfully reindexed all transactions by date")
+                _load_tx.clear()
                 st.rerun()
             else:
                 st.error("Error reindexing transactions")
@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
-import os
-from utils.database import load_from_database
+import numpy as np
+from utils.database import load_from_database, delete_budget, get_transaction_count, get_db_mtime
 from utils.categorization import get_category_list
+from utils.messages import show_message
 from utils.budgeting import (
     create_budget, save_budget, load_budget, get_budget_months,
-    compare_budget_vs_actual, plot_budget_comparison,
-    calculate_budget_progress, plot_budget_progress
+    monthly_category_spending, compare_budget_vs_spending, calculate_budget_progress
 )
 import datetime
+from heapq import merge
+from bisect import bisect_left
 
 st.set_page_config(
     page_title="Budgeting - Personal Finance Tracker",
@@ -22,11 +24,96 @@ st.title("Budget Planning and Tracking")
 if 'db_path' not in st.session_state:
     st.session_state.db_path = 'finance_data.db'
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_transactions(db_path, mtime):
+    transactions = load_from_database(db_path)
+    
+    # Everything below reads dates through .dt, so make sure the column is datetime64
+    # once per load rather than relying on every caller to convert it
+    if 'date' in transactions.columns and not pd.api.types.is_datetime64_any_dtype(transactions['date']):
+        transactions['date'] = pd.to_datetime(transactions['date'], format='mixed', errors='coerce', cache=True)
+    
+    # Low-cardinality text columns group and serialize much faster as categoricals
+    transactions['category'] = transactions['category'].astype('category')
+    transactions['source'] = transactions['source'].astype('category')
+    return transactions
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_transaction_count(db_path, mtime):
+    return get_transaction_count(db_path)
+
+def _months_from_dates(dates):
+    # Dedupe at month granularity on the period codes before making any strings
+    return np.sort(dates.dt.to_period('M').unique().astype(str)).tolist()
+
+def _sorted_unique_merge(a, b):
+    # Merge two ascending lists into one ascending list without duplicates
+    merged = []
+    prev = None
+    for m in merge(a, b):
+        if m != prev:
+            merged.append(m)
+            prev = m
+    return merged
+
+def _default_month_index(months, current_month):
+    # Position of current_month in the ascending month list, else the most recent month
+    idx = bisect_left(months, current_month)
+    return idx if idx < len(months) and months[idx] == current_month else len(months) - 1
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_transaction_months(db_path, mtime):
+    return _months_from_dates(_cached_transactions(db_path, mtime)['date'])
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_budget_months(db_path, mtime):
+    return get_budget_months(db_path)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_budget(month, db_path, mtime):
+    return load_budget(month, db_path)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_monthly_spending(db_path, mtime):
+    # Spending per category for every month from a single groupby, so switching
+    # months never rescans the transaction history
+    return monthly_category_spending(_cached_transactions(db_path, mtime))
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_comparison(month, db_path, mtime):
+    # A month without expenses compares against no spending at all
+    month_spending = _cached_monthly_spending(db_path, mtime).get(month, pd.Series(dtype=float))
+    return compare_budget_vs_spending(month_spending, _cached_budget(month, db_path, mtime))
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_budget_progress(month, db_path, mtime):
+    # Shares the comparison's key, so the metrics and alert tables are only
+    # recomputed when the month or the database changes
+    return calculate_budget_progress(_cached_comparison(month, db_path, mtime))
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _cached_budget_figures(month, db_path, mtime):
+    # Plotly figures are rebuilt only when the month or the database changes;
+    # cache_resource hands back the same objects instead of unpickling copies.
+    # The plotting helpers (and with them Plotly) are only imported once a chart is needed
+    from utils.budgeting import plot_budget_comparison, plot_budget_progress
+    return (plot_budget_progress(_cached_budget_progress(month, db_path, mtime)),
+            plot_budget_comparison(_cached_comparison(month, db_path, mtime)))
+
+# Display formats for the budget tables; the frontend formats the numeric
+# columns, so the values are sent as numbers and stay sortable
+_ALERT_COLUMN_CONFIG = {
+    'budget_amount': st.column_config.NumberColumn(format="dollar"),
+    'actual_amount': st.column_config.NumberColumn(format="dollar"),
+    'percentage_used': st.column_config.NumberColumn(format="%.2f%%")
+}
+_COMPARISON_COLUMN_CONFIG = {**_ALERT_COLUMN_CONFIG, 'difference': st.column_config.NumberColumn(format="dollar")}
+
 def main():
-    # Load all transactions
-    transactions = load_from_database(st.session_state.db_path)
-    
-    if transactions.empty:
+    # A row count is enough to decide whether there is anything to budget against;
+    # the full transaction frame is only loaded by the sections that need it
+    db_path = st.session_state.db_path
+    if _cached_transaction_count(db_path, get_db_mtime(db_path)) == 0:
         st.info("No transactions found. Import your financial data first.")
         return
     
@@ -34,17 +121,20 @@ def main():
     tab1, tab2 = st.tabs(["Budget Overview", "Create/Edit Budget"])
     
     with tab1:
-        show_budget_overview(transactions)
+        show_budget_overview()
     
     with tab2:
         create_edit_budget()
 
-def show_budget_overview(transactions):
+def show_budget_overview():
+    db_path = st.session_state.db_path
+    mtime = get_db_mtime(db_path)
+    
     # Get all available months with budgets
-    budget_months = get_budget_months(st.session_state.db_path)
+    budget_months = _cached_budget_months(db_path, mtime)
     
     # Get months from transactions
-    transaction_months = sorted(transactions['date'].dt.strftime('%Y-%m').unique().tolist())
+    transaction_months = _cached_transaction_months(db_path, mtime)
     current_month = datetime.datetime.now().strftime('%Y-%m')
     
     # Sidebar controls
@@ -54,7 +144,7 @@ def show_budget_overview(transactions):
         st.info("No budget has been created yet. Use the 'Create/Edit Budget' tab to set up your budget.")
         
         # Still allow selecting a month for potential budget creation
-        default_month_index = transaction_months.index(current_month) if current_month in transaction_months else len(transaction_months) - 1
+        default_month_index = _default_month_index(transaction_months, current_month)
         selected_month = st.sidebar.selectbox(
             "Select Month for Budget Creation",
             transaction_months,
@@ -63,31 +153,29 @@ def show_budget_overview(transactions):
         return
     
     # Month selector - combine budget months and transaction months
-    all_months = sorted(list(set(budget_months + transaction_months)))
+    # (budget months come back newest first, so walk them in reverse)
+    all_months = _sorted_unique_merge(reversed(budget_months), transaction_months)
     
     # Default to current month if available, otherwise most recent
-    default_month_index = all_months.index(current_month) if current_month in all_months else len(all_months) - 1
+    default_month_index = _default_month_index(all_months, current_month)
     selected_month = st.sidebar.selectbox(
         "Select Month for Budget Comparison",
         all_months,
         index=default_month_index
     )
     
-    # Load budget for the selected month
-    budget_df = load_budget(selected_month, st.session_state.db_path)
-    
     # Budget overview
     st.header(f"Budget Overview for {selected_month}")
     
     # Compare budget with actual spending
-    comparison = compare_budget_vs_actual(transactions, budget_df, selected_month)
+    comparison = _cached_comparison(selected_month, db_path, mtime)
     
     if comparison.empty:
         st.info(f"No budget comparison data available for {selected_month}.")
         return
     
     # Calculate budget progress metrics
-    budget_progress = calculate_budget_progress(comparison)
+    budget_progress = _cached_budget_progress(selected_month, db_path, mtime)
     
     # Display metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -99,15 +187,13 @@ def show_budget_overview(transactions):
     
     # Budget progress gauge
     st.subheader("Overall Budget Progress")
-    progress_fig = plot_budget_progress(budget_progress)
+    progress_fig, comparison_fig = _cached_budget_figures(selected_month, db_path, mtime)
     
     if progress_fig:
         st.plotly_chart(progress_fig, use_container_width=True)
     
     # Budget comparison chart
     st.subheader("Budget vs. Actual Spending by Category")
-    comparison_fig = plot_budget_comparison(comparison)
-    
     if comparison_fig:
         st.plotly_chart(comparison_fig, use_container_width=True)
     
@@ -115,49 +201,67 @@ def show_budget_overview(transactions):
     st.subheader("Budget Alerts")
     
     # Over budget categories
-    if budget_progress['categories_over_budget']:
+    if not budget_progress['categories_over_budget'].empty:
         st.error("Categories Over Budget:")
-        over_budget_df = pd.DataFrame(budget_progress['categories_over_budget'])
-        over_budget_df['budget_amount'] = over_budget_df['budget_amount'].map('${:,.2f}'.format)
-        over_budget_df['actual_amount'] = over_budget_df['actual_amount'].map('${:,.2f}'.format)
-        over_budget_df['percentage_used'] = over_budget_df['percentage_used'].map('{:.2f}%'.format)
-        st.dataframe(over_budget_df, use_container_width=True)
+        st.dataframe(budget_progress['categories_over_budget'], use_container_width=True, column_config=_ALERT_COLUMN_CONFIG)
     else:
         st.success("No categories are over budget!")
     
     # Near limit categories
-    if budget_progress['categories_near_limit']:
+    if not budget_progress['categories_near_limit'].empty:
         st.warning("Categories Approaching Budget Limit:")
-        near_limit_df = pd.DataFrame(budget_progress['categories_near_limit'])
-        near_limit_df['budget_amount'] = near_limit_df['budget_amount'].map('${:,.2f}'.format)
-        near_limit_df['actual_amount'] = near_limit_df['actual_amount'].map('${:,.2f}'.format)
-        near_limit_df['percentage_used'] = near_limit_df['percentage_used'].map('{:.2f}%'.format)
-        st.dataframe(near_limit_df, use_container_width=True)
+        st.dataframe(budget_progress['categories_near_limit'], use_container_width=True, column_config=_ALERT_COLUMN_CONFIG)
     
     # Detailed budget comparison table
     st.subheader("Detailed Budget Comparison")
     
-    # Format table for display
-    display_comparison = comparison.copy()
-    display_comparison['budget_amount'] = display_comparison['budget_amount'].map('${:,.2f}'.format)
-    display_comparison['actual_amount'] = display_comparison['actual_amount'].map('${:,.2f}'.format)
-    display_comparison['difference'] = display_comparison['difference'].map('${:,.2f}'.format)
-    display_comparison['percentage_used'] = display_comparison['percentage_used'].map('{:.2f}%'.format)
+    st.dataframe(comparison, use_container_width=True, column_config=_COMPARISON_COLUMN_CONFIG)
+
+def _budget_editor(budget_df, month):
+    # A single grid for all category amounts instead of one number_input per category;
+    # keyed by month so switching months starts from that month's values
+    edited = st.data_editor(
+        budget_df,
+        key=f"budget_editor_{month}",
+        num_rows="fixed",
+        hide_index=True,
+        use_container_width=True,
+        disabled=['category'],
+        column_config={
+            'category': st.column_config.TextColumn("Category"),
+            'budget_amount': st.column_config.NumberColumn("Budget", min_value=0.0, step=10.0, format="dollar")
+        }
+    )
     
-    st.dataframe(display_comparison, use_container_width=True)
+    # A cleared cell comes back empty; treat it as no budget
+    edited['budget_amount'] = edited['budget_amount'].fillna(0.0)
+    return edited
+
+def _delete_budget_month(month, db_path):
+    # Delete button callback; only the budget caches are invalidated
+    if delete_budget(month, db_path):
+        st.session_state.budget_delete_message = ('success', f"Budget for {month} has been deleted.")
+        _cached_budget_months.clear()
+        _cached_budget.clear()
+        _cached_comparison.clear()
+        _cached_budget_progress.clear()
+        _cached_budget_figures.clear()
+    else:
+        st.session_state.budget_delete_message = ('error', "Failed to delete budget.")
 
 def create_edit_budget():
     # Get the list of categories
     categories = get_category_list()
     
     # Get transaction months for selection
-    transactions = load_from_database(st.session_state.db_path)
-    all_months = sorted(transactions['date'].dt.strftime('%Y-%m').unique().tolist())
+    db_path = st.session_state.db_path
+    mtime = get_db_mtime(db_path)
+    all_months = _cached_transaction_months(db_path, mtime)
     current_month = datetime.datetime.now().strftime('%Y-%m')
     
     # Default to current month if available, otherwise most recent
     if all_months:
-        default_month_index = all_months.index(current_month) if current_month in all_months else len(all_months) - 1
+        default_month_index = _default_month_index(all_months, current_month)
     else:
         default_month_index = 0
         all_months = [current_month]  # Use current month if no transaction data
@@ -169,77 +273,51 @@ def create_edit_budget():
         index=default_month_index
     )
     
-    # Get budget months to check if one exists for the selected month
-    budget_months = get_budget_months(st.session_state.db_path)
+    # Get budget months to check if one exists for the selected month; reused
+    # below for the existing/delete sections unless a save changes them
+    budget_months = _cached_budget_months(db_path, mtime)
     
-    # Check if budget already exists for the selected month
-    if selected_month in budget_months:
-        existing_budget = load_budget(selected_month, st.session_state.db_path)
+    # Check if budget already exists for the selected month; both cases share the
+    # same editor and only differ in their starting amounts and labels
+    budget_exists = selected_month in budget_months
+    if budget_exists:
+        existing_budget = _cached_budget(selected_month, db_path, mtime)
         st.header(f"Edit Budget for {selected_month}")
-        
-        # Convert existing budget to dictionary for easier handling
-        existing_budget_dict = dict(zip(existing_budget['category'], existing_budget['budget_amount']))
-        
-        # Create input fields for each category
-        budget_amounts = {}
-        
-        st.markdown("Enter budget amounts for each category:")
-        
-        # Use columns to make the form more compact
-        cols = st.columns(3)
-        for i, category in enumerate(categories):
-            # Get existing budget amount or default to 0
-            default_value = existing_budget_dict.get(category, 0.0)
-            
-            # Create input field in the appropriate column
-            budget_amounts[category] = cols[i % 3].number_input(
-                f"{category}",
-                min_value=0.0,
-                value=float(default_value),
-                step=10.0,
-                format="%.2f"
-            )
-        
-        if st.button("Update Budget"):
-            # Create new budget dataframe
-            new_budget = create_budget(list(budget_amounts.keys()), list(budget_amounts.values()))
-            
-            # Save to database
-            if save_budget(new_budget, selected_month, st.session_state.db_path):
-                st.success(f"Budget for {selected_month} updated successfully!")
-            else:
-                st.error("Failed to save budget.")
+        existing_amounts = existing_budget.set_index('category')['budget_amount']
     else:
         st.header(f"Create New Budget for {selected_month}")
+        existing_amounts = pd.Series(dtype=float)
+    
+    # One editable row per category, defaulting to the existing amount or 0
+    budget_df = pd.DataFrame({
+        'category': categories,
+        'budget_amount': existing_amounts.reindex(categories, fill_value=0.0).to_numpy(dtype=float)
+    })
+    
+    st.markdown("Enter budget amounts for each category:")
+    # Edits inside the form are held client-side until submit, so typing amounts
+    # doesn't rerun the page (and reload the month lists) after every cell
+    with st.form("budget_form", clear_on_submit=False):
+        edited = _budget_editor(budget_df, selected_month)
+        submitted = st.form_submit_button("Update Budget" if budget_exists else "Create Budget")
+    
+    if submitted:
+        # Create new budget dataframe
+        new_budget = create_budget(edited['category'].tolist(), edited['budget_amount'].tolist())
         
-        # Create input fields for each category
-        budget_amounts = {}
-        
-        st.markdown("Enter budget amounts for each category:")
-        
-        # Use columns to make the form more compact
-        cols = st.columns(3)
-        for i, category in enumerate(categories):
-            budget_amounts[category] = cols[i % 3].number_input(
-                f"{category}",
-                min_value=0.0,
-                value=0.0,
-                step=10.0,
-                format="%.2f"
-            )
-        
-        if st.button("Create Budget"):
-            # Create new budget dataframe
-            new_budget = create_budget(list(budget_amounts.keys()), list(budget_amounts.values()))
-            
-            # Save to database
-            if save_budget(new_budget, selected_month, st.session_state.db_path):
-                st.success(f"Budget for {selected_month} created successfully!")
-            else:
-                st.error("Failed to save budget.")
+        # Save to database
+        if save_budget(new_budget, selected_month, st.session_state.db_path):
+            st.success(f"Budget for {selected_month} {'updated' if budget_exists else 'created'} successfully!")
+            _cached_budget.clear()
+            _cached_budget_months.clear()
+            _cached_comparison.clear()
+            _cached_budget_progress.clear()
+            _cached_budget_figures.clear()
+            budget_months = _cached_budget_months(db_path, get_db_mtime(db_path))
+        else:
+            st.error("Failed to save budget.")
     
     # Show existing budgets
-    budget_months = get_budget_months(st.session_state.db_path)
     if budget_months:
         st.markdown("---")
         st.subheader("Existing Budgets")
@@ -256,20 +334,13 @@ def create_edit_budget():
             budget_months
         )
         
-        if st.button(f"Delete Budget for {delete_month}"):
-            # This will delete the budget for the selected month
-            import sqlite3
-            try:
-                conn = sqlite3.connect(st.session_state.db_path)
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM budgets WHERE month = ?", (delete_month,))
-                conn.commit()
-                conn.close()
-                st.success(f"Budget for {delete_month} has been deleted.")
-                # Refresh the page to show the changes
-                st.rerun()
-            except Exception as e:
-                st.error(f"Failed to delete budget: {str(e)}")
+        # The delete runs in the button callback, before the page reruns, so the
+        # overview and month lists above are already up to date without st.rerun()
+        st.button(f"Delete Budget for {delete_month}", on_click=_delete_budget_month,
+                  args=(delete_month, st.session_state.db_path))
+    
+    # Result of a delete from the previous run
+    show_message('budget_delete_message')
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,7 @@
 import streamlit as st
 import pandas as pd
+from utils.database import get_db_mtime
+from utils.messages import show_message
 from utils.account_balance import get_account_balances, update_account_balance, delete_account
 
 st.set_page_config(
@@ -14,6 +16,54 @@ st.title("Manage Account Balances")
 if 'db_path' not in st.session_state:
     st.session_state.db_path = 'finance_data.db'
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_balances(db_path, mtime):
+    df = get_account_balances(db_path)
+    return df, float(df['balance'].sum()) if not df.empty else 0.0
+
+# Display formats for the balance table; the frontend formats the values, so
+# missing timestamps simply show as empty cells
+_BALANCE_COLUMN_CONFIG = {
+    'Balance': st.column_config.NumberColumn(format="dollar"),
+    'Last Updated': st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")
+}
+
+def _submit_balance():
+    # Update balance form callback; invalidates only the balances cache on success
+    selected_account = st.session_state.account_select
+    balance = st.session_state.balance_input
+    
+    if selected_account == "New Account":
+        account_name = st.session_state.get('new_account_name', '')
+        if not account_name:
+            st.session_state.update_message = ('error', "Please enter an account name")
+            return
+    else:
+        account_name = selected_account
+    
+    if balance < 0 and not st.session_state.get('confirm_negative', False):
+        # Show the confirmation checkbox and wait for the next submit
+        st.session_state.confirm_negative_pending = True
+        return
+    
+    st.session_state.confirm_negative_pending = False
+    st.session_state.confirm_negative = False
+    if update_account_balance(account_name, balance, st.session_state.db_path):
+        st.session_state.update_message = ('success', f"Balance for {account_name} updated successfully")
+        _cached_balances.clear()
+    else:
+        st.session_state.update_message = ('error', f"Error updating balance for {account_name}")
+
+def _delete_selected_account():
+    # Delete button callback; invalidates only the balances cache on success
+    account_to_delete = st.session_state.delete_account
+    if delete_account(account_to_delete, st.session_state.db_path):
+        st.session_state.delete_message = ('success', f"Account {account_to_delete} deleted successfully")
+        st.session_state.confirm_delete = False
+        _cached_balances.clear()
+    else:
+        st.session_state.delete_message = ('error', f"Error deleting account {account_to_delete}")
+
 def main():
     # Create columns layout
     col1, col2 = st.columns([2, 1])
@@ -22,26 +72,26 @@ def main():
         st.subheader("Current Account Balances")
         
         # Get account balances
-        balances_df = get_account_balances(st.session_state.db_path)
+        db_path = st.session_state.db_path
+        mtime = get_db_mtime(db_path)
+        balances_df, total_balance = _cached_balances(db_path, mtime)
+        
+        # Account names and a name -> balance lookup, shared by both forms below
+        existing_accounts = balances_df['account_name'].tolist() if not balances_df.empty else []
+        balance_by_name = dict(zip(balances_df['account_name'].to_numpy(), balances_df['balance'].to_numpy()))
         
         if balances_df.empty:
             st.info("No accounts found. Add an account balance using the form.")
         else:
-            # Format display dataframe
-            display_df = balances_df.copy()
-            display_df['balance'] = display_df['balance'].map('${:,.2f}'.format)
-            display_df['last_updated'] = display_df['last_updated'].dt.strftime('%Y-%m-%d %H:%M')
-            display_df = display_df.rename(columns={
+            # Display account balances with readable column names
+            display_df = balances_df.rename(columns={
                 'account_name': 'Account',
                 'balance': 'Balance',
                 'last_updated': 'Last Updated'
             })
-            
-            # Display account balances
-            st.dataframe(display_df, use_container_width=True)
+            st.dataframe(display_df, use_container_width=True, column_config=_BALANCE_COLUMN_CONFIG)
             
             # Total all balances
-            total_balance = balances_df['balance'].sum()
             st.markdown(f"### Total Balance: **${total_balance:,.2f}**")
     
     with col2:
@@ -50,65 +100,48 @@ def main():
         # Add form for updating account balance
         with st.form("update_balance_form"):
             # If we have existing accounts, let user select one or create new
-            existing_accounts = balances_df['account_name'].tolist() if not balances_df.empty else []
-            
             # Add "New Account" option
             account_options = ["New Account"] + existing_accounts if existing_accounts else ["New Account"]
-            selected_account = st.selectbox("Select Account", account_options)
+            selected_account = st.selectbox("Select Account", account_options, key="account_select")
             
             # If user selects "New Account", show text field for name
             if selected_account == "New Account":
-                new_account_name = st.text_input("Account Name (e.g., Wells Fargo)")
-                account_name = new_account_name
+                st.text_input("Account Name (e.g., Wells Fargo)", key="new_account_name")
             else:
-                account_name = selected_account
-                
                 # Get current balance for the selected account
-                current_balance = balances_df[balances_df['account_name'] == account_name]['balance'].iloc[0]
+                current_balance = balance_by_name[selected_account]
                 st.info(f"Current balance: ${current_balance:,.2f}")
             
             # Balance input
-            balance = st.number_input("Balance", value=0.0, step=1.0)
+            balance = st.number_input("Balance", value=0.0, step=1.0, key="balance_input")
             
-            # Submit button
-            submit_button = st.form_submit_button("Update Balance")
+            # Ask for confirmation once a negative balance has been submitted
+            if st.session_state.get('confirm_negative_pending') and balance < 0:
+                st.warning("Are you sure you want to enter a negative balance?")
+                st.checkbox("Yes, I confirm this is correct", key="confirm_negative")
             
-            if submit_button:
-                if selected_account == "New Account" and not new_account_name:
-                    st.error("Please enter an account name")
-                elif balance < 0:
-                    st.warning("Are you sure you want to enter a negative balance?")
-                    confirm = st.checkbox("Yes, I confirm this is correct")
-                    if confirm:
-                        if update_account_balance(account_name, balance, st.session_state.db_path):
-                            st.success(f"Balance for {account_name} updated successfully")
-                            st.rerun()
-                else:
-                    if update_account_balance(account_name, balance, st.session_state.db_path):
-                        st.success(f"Balance for {account_name} updated successfully")
-                        st.rerun()
+            # Submit button; the write happens in the callback, before the page reruns,
+            # so the table above is already fresh and no extra st.rerun() is needed
+            st.form_submit_button("Update Balance", on_click=_submit_balance)
+            show_message('update_message')
         
         # Section for deleting accounts
         st.subheader("Delete Account")
         
         if not balances_df.empty:
-            account_to_delete = st.selectbox("Select Account to Delete", balances_df['account_name'].tolist(), key="delete_account")
+            st.selectbox("Select Account to Delete", existing_accounts, key="delete_account")
             
             # First ask for confirmation with a checkbox
             confirm_delete = st.checkbox("I understand this will permanently delete the account", key="confirm_delete")
             
             # Only show delete button if checkbox is checked
             if confirm_delete:
-                if st.button("Delete Account", type="primary", use_container_width=True):
-                    if delete_account(account_to_delete, st.session_state.db_path):
-                        st.success(f"Account {account_to_delete} deleted successfully")
-                        st.rerun()
-                    else:
-                        st.error(f"Error deleting account {account_to_delete}")
+                st.button("Delete Account", type="primary", use_container_width=True, on_click=_delete_selected_account)
             else:
                 st.button("Delete Account", disabled=True, use_container_width=True)
         else:
             st.info("No accounts to delete")
+        show_message('delete_message')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
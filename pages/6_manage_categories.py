@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
+from collections import namedtuple
 from utils.categorization import (
     get_category_list, get_custom_categories, add_custom_category, 
     delete_custom_category
 )
-from utils.database import load_from_database, update_transaction
+from utils.database import load_from_database, bulk_update_category, get_category_counts, get_db_mtime
+from utils.messages import show_message
 
 st.set_page_config(
     page_title="Manage Categories - Personal Finance Tracker",
@@ -18,13 +19,149 @@ st.title("Manage Categories")
 if 'db_path' not in st.session_state:
     st.session_state.db_path = 'finance_data.db'
 
+# Columns read for description search results
+_SEARCH_COLUMNS = ['id', 'date', 'description', 'amount', 'category', 'source']
+
+# Shortest description search that is sent to the database
+_MIN_SEARCH_LENGTH = 3
+
+# The queries below are filtered in SQLite, so the page never loads the whole table.
+# Bounded with max_entries, since every search term typed is a separate entry.
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_category_counts(db_path, mtime):
+    return get_category_counts(db_path)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_category_transactions(category, db_path, mtime):
+    # Only the IDs are used, to reclassify the rows
+    return load_from_database(db_path, category=category, columns=['id'])
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_search(search_term, db_path, mtime):
+    results = load_from_database(db_path, search=search_term, columns=_SEARCH_COLUMNS)
+    
+    # As a categorical, the sorted set of categories in the results is read from the dtype
+    if not results.empty:
+        results['category'] = results['category'].astype('category')
+    return results
+
+def _current_category_ids(category, db_path):
+    # Uncached lookup for the confirmation callbacks, so they act on the rows that
+    # have the category now rather than when the confirmation was shown
+    return load_from_database(db_path, category=category, columns=['id'])['id'].tolist()
+
+def _clear_transaction_caches():
+    _cached_category_counts.clear()
+    _cached_category_transactions.clear()
+    _cached_search.clear()
+
+# The one confirmation waiting for a Yes/No answer, or None
+PendingAction = namedtuple('PendingAction', 'kind payload')
+
+def _cancel_pending_action():
+    st.session_state.pending_action = None
+
+def _add_category(all_categories, db_path):
+    # Add category form callback
+    new_category = st.session_state.new_category_name
+    if not new_category:
+        return
+    
+    if add_custom_category(new_category, db_path):
+        st.session_state.add_category_message = ('success', f"Category '{new_category}' added successfully!")
+    elif new_category in all_categories:
+        st.session_state.add_category_message = ('error', f"Category '{new_category}' already exists.")
+    else:
+        st.session_state.add_category_message = ('error', "Failed to add category. Please try again.")
+
+def _request_delete(db_path, mtime):
+    # Delete button callback; a category still in use also needs its transactions reclassified
+    category = st.session_state.category_to_delete
+    ids = []
+    if _cached_category_counts(db_path, mtime).get(category, 0) > 0:
+        ids = _cached_category_transactions(category, db_path, mtime)['id'].tolist()
+    st.session_state.pending_action = PendingAction('delete', {'category': category, 'ids': ids})
+
+def _delete_category(category, db_path):
+    # Delete confirmation callback; moves any transactions to Miscellaneous first and
+    # keeps the category if that fails, so no transaction is left pointing at it
+    ids = _current_category_ids(category, db_path)
+    if ids:
+        if not bulk_update_category(ids, 'Miscellaneous', db_path):
+            st.session_state.delete_category_message = (
+                'error', "Failed to reclassify transactions; the category was not deleted. Please try again."
+            )
+            return
+        _clear_transaction_caches()
+    
+    if delete_custom_category(category, db_path):
+        st.session_state.pending_action = None
+        if ids:
+            text = f"Category '{category}' deleted and {len(ids)} transactions reclassified."
+        else:
+            text = f"Category '{category}' deleted successfully!"
+        st.session_state.delete_category_message = ('success', text)
+    else:
+        st.session_state.delete_category_message = ('error', "Failed to delete category. Please try again.")
+
+def _request_bulk_replace(db_path, mtime):
+    # Replace button callback; only arms the confirmation when there is something to change
+    old_category = st.session_state.old_cat
+    new_category = st.session_state.new_cat
+    if old_category == new_category:
+        st.session_state.bulk_replace_message = ('error', "The source and destination categories must be different.")
+        return
+    
+    ids = _cached_category_transactions(old_category, db_path, mtime)['id'].tolist()
+    if not ids:
+        st.session_state.bulk_replace_message = ('info', f"No transactions found with category '{old_category}'.")
+        return
+    
+    st.session_state.pending_action = PendingAction(
+        'bulk_replace', {'old': old_category, 'new': new_category, 'ids': ids}
+    )
+
+def _replace_categories(old_category, new_category, db_path):
+    # Bulk replace confirmation callback
+    ids = _current_category_ids(old_category, db_path)
+    if bulk_update_category(ids, new_category, db_path):
+        st.session_state.pending_action = None
+        st.session_state.bulk_replace_message = (
+            'success', f"Successfully replaced {len(ids)} transactions from '{old_category}' to '{new_category}'."
+        )
+        _clear_transaction_caches()
+    else:
+        st.session_state.bulk_replace_message = ('error', "Failed to update transactions. Please try again.")
+
+def _request_search_update(search_term):
+    # Update button callback; the confirmation only applies while the same search is shown
+    st.session_state.pending_action = PendingAction('search_update', {'search': search_term})
+
+def _update_search_results(ids, new_category, db_path):
+    # Search & categorize confirmation callback
+    if bulk_update_category(ids, new_category, db_path):
+        st.session_state.pending_action = None
+        st.session_state.search_update_message = (
+            'success', f"Successfully updated {len(ids)} transactions to category '{new_category}'."
+        )
+        _clear_transaction_caches()
+    else:
+        st.session_state.search_update_message = ('error', "Failed to update transactions. Please try again.")
+
 def main():
+    db_path = st.session_state.db_path
+    mtime = get_db_mtime(db_path)
+    
+    # Write callbacks run before the script, so this already reflects the last click
+    pending = st.session_state.get('pending_action')
+    
     # Get all categories and separate standard from custom
     all_categories = get_category_list(st.session_state.db_path)
     custom_categories = get_custom_categories(st.session_state.db_path)
     
     # Standard categories are those in all_categories but not in custom_categories
-    standard_categories = [cat for cat in all_categories if cat not in custom_categories]
+    custom_set = set(custom_categories)
+    standard_categories = [cat for cat in all_categories if cat not in custom_set]
     
     # Create two columns layout
     col1, col2 = st.columns(2)
@@ -34,41 +171,29 @@ def main():
         
         # Form for adding a new category
         with st.form("add_category_form"):
-            new_category = st.text_input("New Category Name", placeholder="e.g., 'Hobbies', 'Pet Expenses'")
-            submit_button = st.form_submit_button("Add Category")
-            
-            if submit_button and new_category:
-                if add_custom_category(new_category, st.session_state.db_path):
-                    st.success(f"Category '{new_category}' added successfully!")
-                    st.rerun()
-                else:
-                    if new_category in all_categories:
-                        st.error(f"Category '{new_category}' already exists.")
-                    else:
-                        st.error("Failed to add category. Please try again.")
+            st.text_input("New Category Name", placeholder="e.g., 'Hobbies', 'Pet Expenses'", key="new_category_name")
+            st.form_submit_button("Add Category", on_click=_add_category, args=(all_categories, db_path))
+        show_message('add_category_message')
         
         # Show statistics about category usage
         st.subheader("Category Statistics")
         
-        # Load transactions to analyze category distribution
-        transactions = load_from_database(st.session_state.db_path)
+        # Count transactions per category
+        category_counts = _cached_category_counts(db_path, mtime)
         
-        if not transactions.empty:
-            # Count transactions per category
-            category_counts = transactions['category'].value_counts()
-            
-            # Create DataFrame for display
-            category_stats = pd.DataFrame({
-                'Category': category_counts.index,
-                'Transactions': category_counts.values
-            })
+        if not category_counts.empty:
+            # Columns for display; st.dataframe builds the table straight from the dict
+            category_stats = {
+                'Category': category_counts.index.tolist(),
+                'Transactions': category_counts.tolist()
+            }
             
             # Display as a table
             st.dataframe(category_stats, use_container_width=True)
             
             # Show percentage of transactions without categories
-            uncategorized = transactions[transactions['category'].isin(['Uncategorized', 'Miscellaneous'])].shape[0]
-            total = transactions.shape[0]
+            uncategorized = category_counts.reindex(['Uncategorized', 'Miscellaneous'], fill_value=0).sum()
+            total = category_counts.sum()
             
             if total > 0:
                 st.caption(f"**{uncategorized / total * 100:.1f}%** of transactions are uncategorized or miscellaneous.")
@@ -85,100 +210,52 @@ def main():
         with tabs[0]:
             # Display standard categories (read-only)
             st.write("**Standard Categories:**")
-            standard_cats_df = pd.DataFrame({'Category': standard_categories})
-            st.dataframe(standard_cats_df, use_container_width=True)
+            st.dataframe({'Category': standard_categories}, use_container_width=True)
             
             # Display custom categories
             if custom_categories:
                 st.write("**Custom Categories:**")
-                
-                # Create a DataFrame with custom categories
-                custom_cats_df = pd.DataFrame({'Category': custom_categories})
-                st.dataframe(custom_cats_df, use_container_width=True)
+                st.dataframe({'Category': custom_categories}, use_container_width=True)
             else:
                 st.info("No custom categories have been added yet.")
                 
         # Second tab: Delete categories
         with tabs[1]:
+            show_message('delete_category_message')
+            
             if custom_categories:
                 # Option to delete a custom category
-                category_to_delete = st.selectbox(
+                st.selectbox(
                     "Select Category to Delete", 
-                    options=custom_categories
+                    options=custom_categories,
+                    key="category_to_delete"
                 )
                 
-                # Manage confirmation state for category deletion
-                if 'delete_confirmation' not in st.session_state:
-                    st.session_state.delete_confirmation = False
-                
-                if 'delete_with_reclass_confirmation' not in st.session_state:
-                    st.session_state.delete_with_reclass_confirmation = False
-                
-                # Initial delete button
-                if not st.session_state.delete_confirmation and not st.session_state.delete_with_reclass_confirmation:
-                    if st.button("Delete Selected Category"):
-                        # Check if this category is used in any transaction
-                        category_used = False
-                        if not transactions.empty:
-                            category_used = transactions[transactions['category'] == category_to_delete].shape[0] > 0
-                        
-                        if category_used:
-                            # If used, set the delete_with_reclass_confirmation state
-                            st.session_state.delete_with_reclass_confirmation = True
-                        else:
-                            # If not used, set the regular delete_confirmation state
-                            st.session_state.delete_confirmation = True
-                        
-                        st.rerun()
-                
-                # Simple delete confirmation (no reclassification needed)
-                elif st.session_state.delete_confirmation:
-                    st.info(f"Category '{category_to_delete}' is not used in any transactions and can be safely deleted.")
-                    
-                    col_yes, col_no = st.columns(2)
-                    
-                    with col_yes:
-                        if st.button("Yes, Delete Category", key="delete_confirm_yes"):
-                            if delete_custom_category(category_to_delete, st.session_state.db_path):
-                                st.session_state.delete_confirmation = False
-                                st.success(f"Category '{category_to_delete}' deleted successfully!")
-                                st.rerun()
-                            else:
-                                st.error("Failed to delete category. Please try again.")
-                    
-                    with col_no:
-                        if st.button("No, Cancel", key="delete_confirm_no"):
-                            st.session_state.delete_confirmation = False
-                            st.rerun()
-                
-                # Delete with reclassification confirmation
-                elif st.session_state.delete_with_reclass_confirmation:
-                    # Count transactions that would be affected
-                    transactions_to_update = transactions[transactions['category'] == category_to_delete]
-                    count = len(transactions_to_update)
+                if pending is None or pending.kind != 'delete':
+                    st.button("Delete Selected Category", on_click=_request_delete, args=(db_path, mtime))
+                else:
+                    category = pending.payload['category']
+                    ids = pending.payload['ids']
                     
-                    st.warning(f"Category '{category_to_delete}' is currently used in {count} transactions. Deleting will change these transactions to 'Miscellaneous'.")
+                    if ids:
+                        # Delete with reclassification confirmation
+                        st.warning(f"Category '{category}' is currently used in {len(ids)} transactions. Deleting will change these transactions to 'Miscellaneous'.")
+                    else:
+                        # Simple delete confirmation (no reclassification needed)
+                        st.info(f"Category '{category}' is not used in any transactions and can be safely deleted.")
                     
                     col_yes, col_no = st.columns(2)
                     
                     with col_yes:
-                        if st.button("Yes, Delete & Reclassify", key="reclass_confirm_yes"):
-                            # First update all transactions with this category to Miscellaneous
-                            for idx, transaction in transactions_to_update.iterrows():
-                                update_transaction(transaction['id'], 'category', 'Miscellaneous', st.session_state.db_path)
-                            
-                            # Then delete the category
-                            if delete_custom_category(category_to_delete, st.session_state.db_path):
-                                st.session_state.delete_with_reclass_confirmation = False
-                                st.success(f"Category '{category_to_delete}' deleted and {count} transactions reclassified.")
-                                st.rerun()
-                            else:
-                                st.error("Failed to delete category. Please try again.")
+                        st.button(
+                            "Yes, Delete & Reclassify" if ids else "Yes, Delete Category",
+                            key="reclass_confirm_yes" if ids else "delete_confirm_yes",
+                            on_click=_delete_category,
+                            args=(category, db_path)
+                        )
                     
                     with col_no:
-                        if st.button("No, Cancel", key="reclass_confirm_no"):
-                            st.session_state.delete_with_reclass_confirmation = False
-                            st.rerun()
+                        st.button("No, Cancel", key="delete_confirm_no", on_click=_cancel_pending_action)
             else:
                 st.info("No custom categories have been added yet.")
         
@@ -189,57 +266,39 @@ def main():
             col_a, col_b = st.columns(2)
             
             with col_a:
-                old_category = st.selectbox("From Category", all_categories, key="old_cat")
+                st.selectbox("From Category", all_categories, key="old_cat")
             
             with col_b:
-                new_category = st.selectbox("To Category", all_categories, key="new_cat")
+                st.selectbox("To Category", all_categories, key="new_cat")
             
-            # Manage confirmation state for bulk replace
-            if 'bulk_replace_confirmation' not in st.session_state:
-                st.session_state.bulk_replace_confirmation = False
+            show_message('bulk_replace_message')
             
-            if not st.session_state.bulk_replace_confirmation:
-                if st.button("Replace Categories"):
-                    if old_category == new_category:
-                        st.error("The source and destination categories must be different.")
-                    else:
-                        st.session_state.bulk_replace_confirmation = True
-                        st.rerun()
+            if pending is None or pending.kind != 'bulk_replace':
+                st.button("Replace Categories", on_click=_request_bulk_replace, args=(db_path, mtime))
             else:
-                # Count how many transactions will be affected
-                if not transactions.empty:
-                    affected_transactions = transactions[transactions['category'] == old_category]
-                    count = len(affected_transactions)
-                    
-                    if count > 0:
-                        # Confirm the replacement
-                        st.warning(f"This will change {count} transactions from '{old_category}' to '{new_category}'.")
-                        
-                        col_yes, col_no = st.columns(2)
-                        
-                        with col_yes:
-                            if st.button("Yes, Replace Categories", key="bulk_confirm_yes"):
-                                # Update each transaction
-                                for idx, transaction in affected_transactions.iterrows():
-                                    update_transaction(transaction['id'], 'category', new_category, st.session_state.db_path)
-                                
-                                st.session_state.bulk_replace_confirmation = False
-                                st.success(f"Successfully replaced {count} transactions from '{old_category}' to '{new_category}'.")
-                                st.rerun()
-                        
-                        with col_no:
-                            if st.button("No, Cancel", key="bulk_confirm_no"):
-                                st.session_state.bulk_replace_confirmation = False
-                                st.rerun()
-                    else:
-                        st.info(f"No transactions found with category '{old_category}'.")
-                        if st.button("Back"):
-                            st.session_state.bulk_replace_confirmation = False
-                            st.rerun()
+                # Confirm the replacement armed by the Replace button
+                old_category = pending.payload['old']
+                new_category = pending.payload['new']
+                ids = pending.payload['ids']
+                st.warning(f"This will change {len(ids)} transactions from '{old_category}' to '{new_category}'.")
+                
+                col_yes, col_no = st.columns(2)
+                
+                with col_yes:
+                    st.button(
+                        "Yes, Replace Categories",
+                        key="bulk_confirm_yes",
+                        on_click=_replace_categories,
+                        args=(old_category, new_category, db_path)
+                    )
+                
+                with col_no:
+                    st.button("No, Cancel", key="bulk_confirm_no", on_click=_cancel_pending_action)
         
         # Fourth tab: Search by Description and Recategorize
         with tabs[3]:
             st.write("Search for transactions by description and update their categories.")
+            show_message('search_update_message')
             
             # Search field for transaction descriptions
             description_search = st.text_input(
@@ -248,31 +307,33 @@ def main():
                 help="Enter a keyword or phrase to search in transaction descriptions. Case insensitive."
             )
             
-            # Execute search when text is entered
-            if description_search:
+            # Execute search once enough text is entered; shorter terms match most of the table
+            if description_search and len(description_search) < _MIN_SEARCH_LENGTH:
+                st.info(f"Enter at least {_MIN_SEARCH_LENGTH} characters to search.")
+            elif description_search:
                 # Find matching transactions
-                if not transactions.empty:
-                    matching_transactions = transactions[
-                        transactions['description'].str.contains(description_search, case=False, na=False)
-                    ]
+                if not category_counts.empty:
+                    matching_transactions = _cached_search(description_search, db_path, mtime)
                     
                     # Display results
                     if not matching_transactions.empty:
                         st.write(f"Found {len(matching_transactions)} transactions matching '{description_search}'")
                         
-                        # Format for display
-                        display_df = matching_transactions[['date', 'description', 'amount', 'category', 'source']].copy()
-                        display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-                        display_df['amount'] = display_df['amount'].map('${:,.2f}'.format)
-                        
-                        # Show the matching transactions
-                        st.dataframe(display_df, use_container_width=True)
+                        # Show the matching transactions; dates and amounts are formatted by the frontend
+                        st.dataframe(
+                            matching_transactions[['date', 'description', 'amount', 'category', 'source']],
+                            use_container_width=True,
+                            column_config={
+                                'date': st.column_config.DateColumn(format="YYYY-MM-DD"),
+                                'amount': st.column_config.NumberColumn(format="dollar")
+                            }
+                        )
                         
                         # Category update section
                         st.write("**Update Category for These Transactions**")
                         
                         # Get unique current categories in the search results
-                        current_categories = sorted(matching_transactions['category'].unique())
+                        current_categories = matching_transactions['category'].cat.categories.tolist()
                         
                         # Option to filter by current category
                         filter_current_category = st.selectbox(
@@ -296,38 +357,34 @@ def main():
                             ]
                             st.write(f"Will update {len(filtered_transactions)} transactions that have category '{filter_current_category}'")
                         
-                        # Manage confirmation state
-                        if 'update_confirmation_state' not in st.session_state:
-                            st.session_state.update_confirmation_state = False
-                        
                         # Update button and confirmation
-                        if not st.session_state.update_confirmation_state:
-                            if st.button(f"Update {len(filtered_transactions)} Transaction Categories"):
-                                st.session_state.update_confirmation_state = True
-                                st.rerun()
+                        if pending is None or pending.kind != 'search_update' or pending.payload['search'] != description_search:
+                            st.button(
+                                f"Update {len(filtered_transactions)} Transaction Categories",
+                                on_click=_request_search_update,
+                                args=(description_search,)
+                            )
                         else:
                             # Show confirmation warning and buttons
                             st.warning(f"This will update {len(filtered_transactions)} transactions matching '{description_search}' to category '{new_category}'.")
                             
+                            # Only the transactions whose category is different need an update
+                            update_ids = filtered_transactions.loc[
+                                filtered_transactions['category'] != new_category, 'id'
+                            ].tolist()
+                            
                             col_yes, col_no = st.columns(2)
                             
                             with col_yes:
-                                if st.button("Yes, Update Categories", key="confirm_yes"):
-                                    # Update each transaction
-                                    update_count = 0
-                                    for idx, transaction in filtered_transactions.iterrows():
-                                        if transaction['category'] != new_category:  # Only update if different
-                                            update_transaction(transaction['id'], 'category', new_category, st.session_state.db_path)
-                                            update_count += 1
-                                    
-                                    st.session_state.update_confirmation_state = False
-                                    st.success(f"Successfully updated {update_count} transactions to category '{new_category}'.")
-                                    st.rerun()
+                                st.button(
+                                    "Yes, Update Categories",
+                                    key="confirm_yes",
+                                    on_click=_update_search_results,
+                                    args=(update_ids, new_category, db_path)
+                                )
                             
                             with col_no:
-                                if st.button("No, Cancel", key="confirm_no"):
-                                    st.session_state.update_confirmation_state = False
-                                    st.rerun()
+                                st.button("No, Cancel", key="confirm_no", on_click=_cancel_pending_action)
                     else:
                         st.info(f"No transactions found with description containing '{description_search}'.")
                 else:
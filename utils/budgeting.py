@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 from utils.database import save_budget as db_save_budget
 from utils.database import load_budget as db_load_budget
@@ -95,33 +93,66 @@ def compare_budget_vs_actual(transactions_df, budget_df, month=None):
     if transactions_df.empty or budget_df.empty:
         return pd.DataFrame()
     
-    transactions_df = transactions_df.copy()
-    
-    # Filter transactions for the specified month
+    # Filter transactions for the specified month; the month column is only needed
+    # for the mask, so it is not added to (a copy of) the caller's frame
+    month_year = transactions_df['date'].dt.to_period('M')
     if month:
         month_period = pd.Period(month)
-        transactions_df['month_year'] = transactions_df['date'].dt.to_period('M')
-        mask = transactions_df['month_year'] == month_period
+        mask = month_year == month_period
     else:
         # Use current month if not specified
         current_month = pd.Period(datetime.now(), freq='M')
-        transactions_df['month_year'] = transactions_df['date'].dt.to_period('M')
-        mask = transactions_df['month_year'] == current_month
+        mask = month_year == current_month
+    
+    # Get actual spending by category (expenses only); only the two columns the
+    # groupby needs are taken, so the other columns aren't copied for the month
+    filtered_transactions = transactions_df.loc[mask & (transactions_df['amount'] < 0), ['category', 'amount']]
+    
+    # observed=True so a categorical column doesn't add zero rows for categories with no spending
+    actual_spending = filtered_transactions.groupby('category', observed=True)['amount'].sum().abs()
+    
+    return compare_budget_vs_spending(actual_spending, budget_df)
+
+def monthly_category_spending(transactions_df):
+    """
+    Total expense spending per category for every month
+    
+    Parameters:
+        transactions_df (pandas.DataFrame): Transaction data
+    
+    Returns:
+        dict: Maps each month ('YYYY-MM') to a pandas.Series of positive spending
+            totals indexed by category
+    """
+    expenses = transactions_df.loc[transactions_df['amount'] < 0, ['date', 'category', 'amount']]
+    
+    # One groupby over all expenses; each month's comparison then only reads its own few rows
+    totals = expenses.groupby([expenses['date'].dt.to_period('M'), 'category'], observed=True)['amount'].sum().abs()
+    return {str(month): spending.droplevel(0) for month, spending in totals.groupby(level=0)}
+
+def compare_budget_vs_spending(actual_spending, budget_df):
+    """
+    Compare a month's spending totals with its budget
     
-    # Get actual spending by category (expenses only)
-    filtered_transactions = transactions_df[mask & (transactions_df['amount'] < 0)]
+    Parameters:
+        actual_spending (pandas.Series): Positive spending totals indexed by category
+        budget_df (pandas.DataFrame): Budget data
     
-    if filtered_transactions.empty:
+    Returns:
+        pandas.DataFrame: Comparison of budget vs. actual spending
+    """
+    if budget_df.empty:
+        return pd.DataFrame()
+    
+    if actual_spending.empty:
         comparison = budget_df.copy()
         comparison['actual_amount'] = 0
         comparison['difference'] = comparison['budget_amount']
         comparison['percentage_used'] = 0
         return comparison
     
-    actual_spending = filtered_transactions.groupby('category')['amount'].sum().abs()
-    
     # Create comparison dataframe
-    comparison = budget_df.set_index('category').copy()
+    comparison = budget_df.set_index('category')
     
     # Add actual spending for categories in the budget
     comparison['actual_amount'] = actual_spending
@@ -164,6 +195,9 @@ def plot_budget_comparison(comparison_df):
     if comparison_df.empty:
         return None
     
+    # Plotly is imported on first use so loading this module stays cheap
+    import plotly.graph_objects as go
+    
     # Sort by budget amount for better visualization
     comparison_df = comparison_df.sort_values('budget_amount', ascending=False)
     
@@ -235,16 +269,19 @@ def calculate_budget_progress(comparison_df):
         comparison_df (pandas.DataFrame): Output from compare_budget_vs_actual
     
     Returns:
-        dict: Dictionary containing budget progress metrics
+        dict: Dictionary containing budget progress metrics; the over-budget and
+            near-limit categories are DataFrames sliced from comparison_df
     """
+    alert_columns = ['category', 'budget_amount', 'actual_amount', 'percentage_used']
+    
     if comparison_df.empty:
         return {
             'total_budget': 0,
             'total_spent': 0,
             'remaining': 0,
             'percentage_used': 0,
-            'categories_over_budget': [],
-            'categories_near_limit': []
+            'categories_over_budget': pd.DataFrame(columns=alert_columns),
+            'categories_near_limit': pd.DataFrame(columns=alert_columns)
         }
     
     # Calculate totals
@@ -258,20 +295,18 @@ def calculate_budget_progress(comparison_df):
         percentage_used = 0
     
     # Find categories over budget
-    over_budget = comparison_df[comparison_df['percentage_used'] > 100]
-    over_budget_list = over_budget[['category', 'budget_amount', 'actual_amount', 'percentage_used']].to_dict('records')
+    over_budget = comparison_df.loc[comparison_df['percentage_used'] > 100, alert_columns].reset_index(drop=True)
     
     # Find categories nearing budget limit (75-100%)
-    near_limit = comparison_df[(comparison_df['percentage_used'] >= 75) & (comparison_df['percentage_used'] <= 100)]
-    near_limit_list = near_limit[['category', 'budget_amount', 'actual_amount', 'percentage_used']].to_dict('records')
+    near_limit = comparison_df.loc[comparison_df['percentage_used'].between(75, 100), alert_columns].reset_index(drop=True)
     
     return {
         'total_budget': total_budget,
         'total_spent': total_spent,
         'remaining': remaining,
         'percentage_used': percentage_used,
-        'categories_over_budget': over_budget_list,
-        'categories_near_limit': near_limit_list
+        'categories_over_budget': over_budget,
+        'categories_near_limit': near_limit
     }
 
 def plot_budget_progress(budget_progress):
@@ -284,6 +319,8 @@ def plot_budget_progress(budget_progress):
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
     """
+    import plotly.graph_objects as go
+    
     percentage = budget_progress['percentage_used']
     
     # Define colors based on percentage
@@ -1,5 +1,131 @@
 import pandas as pd
+import numpy as np
 import re
+import streamlit as st
+
+# Keywords for each category, in priority order: the first category with a
+# matching keyword wins
+_CATEGORY_KEYWORDS = {
+    'Groceries': ['trader', 'safeway', 'grocery', 'market', 'food', 'whole foods', 'albertsons', 'kroger', 'publix', 'aldi'],
+    'Dining': ['restaurant', 'mcdonalds', 'starbucks', 'coffee', 'doordash', 'grubhub', 'uber eats', 'chipotle', 'wendys', 'burger', 'pizza', 'taco', 'cafe'],
+    'Transportation': ['uber', 'lyft', 'gas', 'shell', 'chevron', 'transit', 'parking', 'exxon', 'mobil', 'bp', 'valero', 'toll', 'auto', 'car'],
+    'Shopping': ['amazon', 'target', 'walmart', 'bestbuy', 'ebay', 'etsy', 'costco', 'sams club', 'macys', 'nordstrom', 'tj maxx', 'marshalls', 'kohls'],
+    'Entertainment': ['netflix', 'hbo', 'spotify', 'movie', 'hulu', 'disney', 'theatre', 'theater', 'cinema', 'apple music', 'prime video', 'youtube', 'games'],
+    'Housing': ['rent', 'mortgage', 'hoa', 'maintenance', 'apartment', 'property', 'lease', 'landlord', 'home', 'house'],
+    'Utilities': ['electric', 'water', 'gas', 'internet', 'phone', 'utility', 'bill', 'power', 'cable', 'comcast', 'verizon', 'at&t', 'sprint', 'sewer'],
+    'Health': ['doctor', 'pharmacy', 'medical', 'fitness', 'gym', 'health', 'dental', 'vision', 'cvs', 'walgreens', 'hospital', 'clinic', 'insurance'],
+    'Insurance': ['insurance', 'geico', 'allstate', 'state farm', 'progressive', 'nationwide', 'liberty mutual', 'farmers', 'policy'],
+    'Education': ['tuition', 'course', 'book', 'school', 'university', 'college', 'student', 'loan', 'class', 'education', 'learning'],
+    'Income': ['payroll', 'salary', 'deposit', 'dividend', 'direct deposit', 'payment received', 'interest', 'refund', 'tax return'],
+    'Investments': ['investment', 'transfer to', 'schwab', 'fidelity', 'vanguard', 'etrade', 'robinhood', 'stocks', 'bonds', 'mutual fund', 'retirement'],
+    'Subscriptions': ['subscription', 'membership', 'monthly', 'annual fee', 'renewal', 'recurring'],
+    'Travel': ['hotel', 'flight', 'airbnb', 'airline', 'expedia', 'booking.com', 'airfare', 'vacation', 'travel', 'resort', 'cruise', 'tour', 'trip'],
+    'Personal Care': ['salon', 'haircut', 'spa', 'beauty', 'cosmetics', 'barber', 'stylist', 'nail', 'massage'],
+    'Gifts & Donations': ['gift', 'donation', 'charity', 'donate', 'present', 'gofundme', 'fundraiser', 'patreon', 'kickstarter'],
+    'Fees & Charges': ['fee', 'charge', 'interest', 'overdraft', 'penalty', 'late', 'service charge', 'atm fee', 'bank fee']
+}
+
+# All keywords in one whole-word pattern with a capture group per category, in
+# priority order. The lookahead makes finditer report a match at every position
+# where some keyword starts, so one pass over a description sees every category
+# it mentions; at a given position the alternation already prefers the
+# higher-priority category.
+_CATEGORY_NAMES = list(_CATEGORY_KEYWORDS)
+_KEYWORD_PATTERN = re.compile(
+    r'(?=\b(?:' + '|'.join('(' + '|'.join(map(re.escape, keywords)) + ')' for keywords in _CATEGORY_KEYWORDS.values()) + r')\b)'
+)
+
+def _keyword_category(description):
+    # Lowest group number seen is the highest-priority category
+    best = None
+    for match in _KEYWORD_PATTERN.finditer(description):
+        if best is None or match.lastindex < best:
+            best = match.lastindex
+            if best == 1:
+                break
+    return _CATEGORY_NAMES[best - 1] if best else 'Miscellaneous'
+
+def _keyword_categories(descriptions):
+    """
+    Categorize transaction descriptions by keyword
+    
+    Parameters:
+        descriptions (pandas.Series): Transaction descriptions
+    
+    Returns:
+        numpy.ndarray: Category for each description; 'Uncategorized' for blank
+            descriptions and 'Miscellaneous' when no keyword matches
+    """
+    blank = (descriptions.isna() | (descriptions == '')).to_numpy()
+    lowered = descriptions.fillna('').astype(str).str.lower()
+    
+    categories = np.full(len(descriptions), 'Uncategorized', dtype=object)
+    
+    # A single scan of each description finds every keyword it contains
+    categories[~blank] = [_keyword_category(description) for description in lowered[~blank]]
+    
+    return categories
+
+# Bank-provided categories and the standardized category each maps to
+_ORIGINAL_CATEGORY_MAP = {
+    # Chase mappings
+    'Food & Drink': 'Dining',
+    'Groceries': 'Groceries',
+    'Travel': 'Travel',
+    'Shopping': 'Shopping',
+    'Bills & Utilities': 'Utilities',
+    'Health & Wellness': 'Health',
+    'Entertainment': 'Entertainment',
+    'Gas': 'Transportation',
+    'Home': 'Housing',
+    'Education': 'Education',
+    'Personal': 'Personal Care',
+    'Gifts & Donations': 'Gifts & Donations',
+    'Business Services': 'Miscellaneous',
+    # Bank of America mappings
+    'Dining': 'Dining',
+    'Grocery': 'Groceries',
+    'Travel & Entertainment': 'Entertainment',
+    'Shopping': 'Shopping',
+    'Household Expenses': 'Housing',
+    'Auto & Transport': 'Transportation',
+    'Health & Wellness': 'Health',
+    'Education': 'Education',
+    'Subscriptions': 'Subscriptions',
+    'Income & Transfers': 'Income',
+    # Wells Fargo mappings
+    'Dining Out': 'Dining',
+    'Groceries/Supermarkets': 'Groceries',
+    'Transportation': 'Transportation',
+    'Shopping/Retail': 'Shopping',
+    'Entertainment': 'Entertainment',
+    'Home/Rent': 'Housing',
+    'Utilities': 'Utilities',
+    'Health/Medical': 'Health',
+    'Insurance': 'Insurance',
+    'Education/School': 'Education',
+    'Income': 'Income',
+    'Investments': 'Investments',
+    'Travel/Vacation': 'Travel',
+}
+
+# Lowercased keys in the same order, for the partial-match fallback
+_ORIGINAL_CATEGORY_LOWER = [(bank_category.lower(), std_category) for bank_category, std_category in _ORIGINAL_CATEGORY_MAP.items()]
+
+def _map_original_categories(originals):
+    """
+    Map a column of bank-provided categories to standardized categories
+    
+    Parameters:
+        originals (pandas.Series): Original categories from the bank, NaN where missing
+    
+    Returns:
+        pandas.Series: Mapped categories, NaN where the original is missing
+    """
+    # A statement only has a handful of distinct bank categories, so each is
+    # mapped once and the column is filled with a dict lookup
+    distinct = originals.dropna().unique()
+    return originals.map(dict(zip(distinct, map(map_original_category, distinct))))
 
 def categorize_transactions(df):
     """
@@ -11,57 +137,23 @@ def categorize_transactions(df):
     Returns:
         pandas.DataFrame: DataFrame with added/updated category column
     """
-    # Define categories and their keywords
-    categories = {
-        'Groceries': ['trader', 'safeway', 'grocery', 'market', 'food', 'whole foods', 'albertsons', 'kroger', 'publix', 'aldi'],
-        'Dining': ['restaurant', 'mcdonalds', 'starbucks', 'coffee', 'doordash', 'grubhub', 'uber eats', 'chipotle', 'wendys', 'burger', 'pizza', 'taco', 'cafe'],
-        'Transportation': ['uber', 'lyft', 'gas', 'shell', 'chevron', 'transit', 'parking', 'exxon', 'mobil', 'bp', 'valero', 'toll', 'auto', 'car'],
-        'Shopping': ['amazon', 'target', 'walmart', 'bestbuy', 'ebay', 'etsy', 'costco', 'sams club', 'macys', 'nordstrom', 'tj maxx', 'marshalls', 'kohls'],
-        'Entertainment': ['netflix', 'hbo', 'spotify', 'movie', 'hulu', 'disney', 'theatre', 'theater', 'cinema', 'apple music', 'prime video', 'youtube', 'games'],
-        'Housing': ['rent', 'mortgage', 'hoa', 'maintenance', 'apartment', 'property', 'lease', 'landlord', 'home', 'house'],
-        'Utilities': ['electric', 'water', 'gas', 'internet', 'phone', 'utility', 'bill', 'power', 'cable', 'comcast', 'verizon', 'at&t', 'sprint', 'sewer'],
-        'Health': ['doctor', 'pharmacy', 'medical', 'fitness', 'gym', 'health', 'dental', 'vision', 'cvs', 'walgreens', 'hospital', 'clinic', 'insurance'],
-        'Insurance': ['insurance', 'geico', 'allstate', 'state farm', 'progressive', 'nationwide', 'liberty mutual', 'farmers', 'policy'],
-        'Education': ['tuition', 'course', 'book', 'school', 'university', 'college', 'student', 'loan', 'class', 'education', 'learning'],
-        'Income': ['payroll', 'salary', 'deposit', 'dividend', 'direct deposit', 'payment received', 'interest', 'refund', 'tax return'],
-        'Investments': ['investment', 'transfer to', 'schwab', 'fidelity', 'vanguard', 'etrade', 'robinhood', 'stocks', 'bonds', 'mutual fund', 'retirement'],
-        'Subscriptions': ['subscription', 'membership', 'monthly', 'annual fee', 'renewal', 'recurring'],
-        'Travel': ['hotel', 'flight', 'airbnb', 'airline', 'expedia', 'booking.com', 'airfare', 'vacation', 'travel', 'resort', 'cruise', 'tour', 'trip'],
-        'Personal Care': ['salon', 'haircut', 'spa', 'beauty', 'cosmetics', 'barber', 'stylist', 'nail', 'massage'],
-        'Gifts & Donations': ['gift', 'donation', 'charity', 'donate', 'present', 'gofundme', 'fundraiser', 'patreon', 'kickstarter'],
-        'Fees & Charges': ['fee', 'charge', 'interest', 'overdraft', 'penalty', 'late', 'service charge', 'atm fee', 'bank fee']
-    }
-    
-    # Function to determine category based on description
-    def get_category(description):
-        if not description or pd.isna(description):
-            return 'Uncategorized'
-            
-        description = str(description).lower()
-        
-        for category, keywords in categories.items():
-            if any(re.search(r'\b' + re.escape(keyword) + r'\b', description) for keyword in keywords):
-                return category
-        
-        return 'Miscellaneous'
-    
-    # Apply categorization
-    if 'original_category' in df.columns and df['original_category'].notna().any():
-        # Use original categories if available (from Chase, etc.)
-        # Map the bank's categories to your standardized ones
-        df['category'] = df.apply(
-            lambda row: map_original_category(row['original_category']) 
-            if pd.notna(row['original_category']) 
-            else (row['category'] if pd.notna(row['category']) else get_category(row['description'])), 
-            axis=1
-        )
+    category = df['category'].astype(object)
+    
+    # Use original categories if available (from Chase, etc.), mapped to the
+    # standardized ones; they take precedence over an existing category
+    if 'original_category' in df.columns:
+        has_original = df['original_category'].notna()
+        category = category.mask(has_original, _map_original_categories(df['original_category']))
     else:
-        # Use keyword matching where category is not already set
-        df['category'] = df.apply(
-            lambda row: row['category'] if pd.notna(row['category']) else get_category(row['description']),
-            axis=1
-        )
+        has_original = pd.Series(False, index=df.index)
     
+    # Use keyword matching where no category is set yet
+    needs_keywords = (category.isna() & ~has_original).to_numpy()
+    if needs_keywords.any():
+        category = category.to_numpy(copy=True)
+        category[needs_keywords] = _keyword_categories(df['description'][needs_keywords])
+    
+    df['category'] = category
     return df
 
 def map_original_category(original):
@@ -76,56 +168,15 @@ def map_original_category(original):
     """
     if pd.isna(original):
         return 'Uncategorized'
-        
-    mapping = {
-        # Chase mappings
-        'Food & Drink': 'Dining',
-        'Groceries': 'Groceries',
-        'Travel': 'Travel',
-        'Shopping': 'Shopping',
-        'Bills & Utilities': 'Utilities',
-        'Health & Wellness': 'Health',
-        'Entertainment': 'Entertainment',
-        'Gas': 'Transportation',
-        'Home': 'Housing',
-        'Education': 'Education',
-        'Personal': 'Personal Care',
-        'Gifts & Donations': 'Gifts & Donations',
-        'Business Services': 'Miscellaneous',
-        # Bank of America mappings
-        'Dining': 'Dining',
-        'Grocery': 'Groceries',
-        'Travel & Entertainment': 'Entertainment',
-        'Shopping': 'Shopping',
-        'Household Expenses': 'Housing',
-        'Auto & Transport': 'Transportation',
-        'Health & Wellness': 'Health',
-        'Education': 'Education',
-        'Subscriptions': 'Subscriptions',
-        'Income & Transfers': 'Income',
-        # Wells Fargo mappings
-        'Dining Out': 'Dining',
-        'Groceries/Supermarkets': 'Groceries',
-        'Transportation': 'Transportation',
-        'Shopping/Retail': 'Shopping',
-        'Entertainment': 'Entertainment',
-        'Home/Rent': 'Housing',
-        'Utilities': 'Utilities',
-        'Health/Medical': 'Health',
-        'Insurance': 'Insurance',
-        'Education/School': 'Education',
-        'Income': 'Income',
-        'Investments': 'Investments',
-        'Travel/Vacation': 'Travel',
-    }
     
     # Try to find an exact match
-    if original in mapping:
-        return mapping[original]
+    if original in _ORIGINAL_CATEGORY_MAP:
+        return _ORIGINAL_CATEGORY_MAP[original]
     
     # Try to find a partial match
-    for bank_category, std_category in mapping.items():
-        if bank_category.lower() in original.lower():
+    original = original.lower()
+    for bank_category, std_category in _ORIGINAL_CATEGORY_LOWER:
+        if bank_category in original:
             return std_category
             
     return 'Miscellaneous'
@@ -161,6 +212,25 @@ def get_custom_categories(db_path='finance_data.db'):
     """
     Get custom categories from the database
     
+    Parameters:
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        list: List of custom category names
+    """
+    try:
+        return _load_custom_categories(db_path)
+    except Exception as e:
+        # Errors propagate out of the cached loader, so a transient failure
+        # is not remembered as an empty category list
+        print(f"Error getting custom categories: {str(e)}")
+        return []
+
+@st.cache_data(show_spinner=False)
+def _load_custom_categories(db_path):
+    """
+    Read the custom categories from the database, creating their table if needed
+    
     Parameters:
         db_path (str): Path to the SQLite database
     
@@ -169,38 +239,33 @@ def get_custom_categories(db_path='finance_data.db'):
     """
     import sqlite3
     
-    try:
-        # Connect to SQLite database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if custom_categories table exists
+    # Connect to SQLite database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # Check if custom_categories table exists
+    cursor.execute('''
+        SELECT name FROM sqlite_master 
+        WHERE type='table' AND name='custom_categories'
+    ''')
+    
+    if cursor.fetchone() is None:
+        # Table doesn't exist, create it
         cursor.execute('''
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='custom_categories'
+            CREATE TABLE custom_categories (
+                id INTEGER PRIMARY KEY,
+                category_name TEXT UNIQUE
+            )
         ''')
-        
-        if cursor.fetchone() is None:
-            # Table doesn't exist, create it
-            cursor.execute('''
-                CREATE TABLE custom_categories (
-                    id INTEGER PRIMARY KEY,
-                    category_name TEXT UNIQUE
-                )
-            ''')
-            conn.commit()
-            return []
-        
-        # Fetch all custom categories
-        cursor.execute('SELECT category_name FROM custom_categories')
-        categories = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
-        return categories
-    
-    except Exception as e:
-        print(f"Error getting custom categories: {str(e)}")
+        conn.commit()
         return []
+    
+    # Fetch all custom categories
+    cursor.execute('SELECT category_name FROM custom_categories')
+    categories = [row[0] for row in cursor.fetchall()]
+    
+    conn.close()
+    return categories
 
 def add_custom_category(category_name, db_path='finance_data.db'):
     """
@@ -242,6 +307,9 @@ def add_custom_category(category_name, db_path='finance_data.db'):
         conn.commit()
         conn.close()
         
+        # The cached category lists no longer match the database
+        _load_custom_categories.clear()
+        
         # Check if anything was actually inserted (based on rowcount)
         return cursor.rowcount > 0
     
@@ -277,6 +345,9 @@ def delete_custom_category(category_name, db_path='finance_data.db'):
         conn.commit()
         conn.close()
         
+        # The cached category lists no longer match the database
+        _load_custom_categories.clear()
+        
         return True
     
     except Exception as e:
@@ -318,27 +389,17 @@ def normalize_transaction_signs(df):
     Returns:
         pandas.DataFrame: DataFrame with normalized amount signs
     """
-    # Make a copy to avoid SettingWithCopyWarning
-    df_copy = df.copy()
-    
     # Get income categories
     income_categories = get_income_categories()
     
-    # Function to apply correct sign
-    def apply_sign(row):
-        # Skip if amount is zero
-        if row['amount'] == 0:
-            return row['amount']
-            
-        # If category is income
-        if row['category'] in income_categories:
-            # Amount should be positive
-            return abs(row['amount'])
-        else:
-            # Expense amounts should be negative
-            return -abs(row['amount'])
-    
-    # Apply the sign normalization
-    df_copy.loc[:, 'amount'] = df_copy.apply(apply_sign, axis=1)
-    
-    return df_copy
+    # Income amounts should be positive and expense amounts negative; zero
+    # amounts are left as they are
+    amount = df['amount'].to_numpy()
+    magnitude = np.abs(amount)
+    is_income = df['category'].isin(income_categories).to_numpy()
+    
+    # A shallow copy shares the other columns with the caller's frame; only the
+    # amount column is replaced, so the caller's frame is left untouched
+    normalized = df.copy(deep=False)
+    normalized['amount'] = np.where(amount == 0, amount, np.where(is_income, magnitude, -magnitude))
+    return normalized
@@ -4,12 +4,43 @@ import os
 from datetime import datetime
 import re
 
+# Column renames for the legacy CSV exports of each source
+_CSV_COLUMNS = {
+    'wells_fargo': {'Date': 'date', 'Description': 'description', 'Amount': 'amount'},
+    'chase': {'Transaction Date': 'date', 'Description': 'description', 'Amount': 'amount', 'Category': 'original_category'},
+    'bank_of_america': {'Posted Date': 'date', 'Payee': 'description', 'Amount': 'amount'},
+    'apple_pay': {'Date': 'date', 'Description': 'description', 'Amount (USD)': 'amount'},
+    'schwab': {'Date': 'date', 'Description': 'description', 'Amount': 'amount'}
+}
+
+def _file_name(filepath):
+    """
+    Return the file name of a path or of a named file-like object such as an upload
+    
+    Parameters:
+        filepath (str or file-like): Path to the file, or a file object with a name attribute
+    
+    Returns:
+        str: File name used for extension and year detection
+    """
+    return getattr(filepath, 'name', filepath)
+
+def _rewind(filepath):
+    """
+    Seek a file-like source back to the start so it can be read again
+    
+    Parameters:
+        filepath (str or file-like): Path to the file, or a seekable file object
+    """
+    if hasattr(filepath, 'seek'):
+        filepath.seek(0)
+
 def import_statement(filepath, source, sheet_name=None):
     """
     Import a statement from any source and standardize the format
     
     Parameters:
-        filepath (str): Path to the statement file
+        filepath (str or file-like): Path to the statement file, or an uploaded file object
         source (str): One of 'wells_fargo', 'chase', 'bank_of_america', 'apple_pay', 'schwab'
         sheet_name (str, optional): Name of the Excel sheet to import. If None, uses the first sheet.
     
@@ -19,6 +50,7 @@ def import_statement(filepath, source, sheet_name=None):
     try:
         # Check file type
         file_type = detect_file_type(filepath)
+        _rewind(filepath)
         
         # Import data based on file type and source
         if file_type in ['xlsx', 'xls']:
@@ -122,45 +154,16 @@ def import_statement(filepath, source, sheet_name=None):
                     break
         elif file_type == 'csv':
             # Legacy CSV support
-            if source == 'wells_fargo':
-                df = pd.read_csv(filepath)
-                df = df.rename(columns={
-                    'Date': 'date',
-                    'Description': 'description',
-                    'Amount': 'amount'
-                })
-            elif source == 'chase':
-                df = pd.read_csv(filepath)
-                df = df.rename(columns={
-                    'Transaction Date': 'date',
-                    'Post Date': 'post_date',
-                    'Description': 'description',
-                    'Amount': 'amount',
-                    'Category': 'original_category'
-                })
-            elif source == 'bank_of_america':
-                df = pd.read_csv(filepath)
-                df = df.rename(columns={
-                    'Posted Date': 'date',
-                    'Payee': 'description',
-                    'Amount': 'amount'
-                })
-            elif source == 'apple_pay':
-                df = pd.read_csv(filepath)
-                df = df.rename(columns={
-                    'Date': 'date',
-                    'Description': 'description',
-                    'Amount (USD)': 'amount'
-                })
-            elif source == 'schwab':
-                df = pd.read_csv(filepath)
-                df = df.rename(columns={
-                    'Date': 'date',
-                    'Description': 'description',
-                    'Amount': 'amount'
-                })
-            else:
+            columns = _CSV_COLUMNS.get(source)
+            if columns is None:
                 raise ValueError(f"Unsupported source: {source}")
+            
+            # Only parse the columns that are kept; a missing optional column
+            # (e.g. Chase's Category) is simply skipped and filled in below.
+            # A 'Sheet' column and year-like headers are kept too, since the date
+            # repair below reads the year from them
+            df = pd.read_csv(filepath, usecols=lambda col: col in columns or col == 'Sheet' or str(col).startswith('20'))
+            df = df.rename(columns=columns)
         else:
             raise ValueError(f"Unsupported file format: {file_type}. Please use Excel or CSV.")
         
@@ -178,9 +181,10 @@ def import_statement(filepath, source, sheet_name=None):
             year = None
             
             # 1. Check if we can extract year from filename
-            if os.path.basename(filepath).startswith('20') and len(os.path.basename(filepath)) >= 4:
+            file_name = os.path.basename(_file_name(filepath))
+            if file_name.startswith('20') and len(file_name) >= 4:
                 try:
-                    year = int(os.path.basename(filepath)[:4])
+                    year = int(file_name[:4])
                     print(f"Extracted year from filename: {year}")
                 except ValueError:
                     pass
@@ -340,7 +344,7 @@ def detect_source_from_header(filepath):
     Try to automatically detect the source bank from file header
     
     Parameters:
-        filepath (str): Path to the file (Excel or CSV)
+        filepath (str or file-like): Path to the file (Excel or CSV), or an uploaded file object
     
     Returns:
         str: Detected source or None if not detected
@@ -348,6 +352,7 @@ def detect_source_from_header(filepath):
     try:
         # Check file type first
         file_type = detect_file_type(filepath)
+        _rewind(filepath)
         header = []
         
         # Extract headers based on file type
@@ -393,12 +398,12 @@ def detect_file_type(filepath):
     Detect file type based on extension
     
     Parameters:
-        filepath (str): Path to the file
+        filepath (str or file-like): Path to the file, or a file object with a name attribute
     
     Returns:
         str: 'xlsx', 'xls', 'csv', 'pdf', or 'unknown'
     """
-    _, ext = os.path.splitext(filepath)
+    _, ext = os.path.splitext(_file_name(filepath))
     ext = ext.lower()
     
     if ext == '.xlsx':
@@ -417,7 +422,7 @@ def read_file_to_preview(filepath, num_rows=5, sheet_name=None):
     Read a file (Excel or CSV) and return a preview for displaying to the user
     
     Parameters:
-        filepath (str): Path to the file
+        filepath (str or file-like): Path to the file, or an uploaded file object
         num_rows (int): Number of rows to preview
         sheet_name (str, optional): For Excel files, which sheet to preview
     
@@ -426,6 +431,7 @@ def read_file_to_preview(filepath, num_rows=5, sheet_name=None):
     """
     try:
         file_type = detect_file_type(filepath)
+        _rewind(filepath)
         
         if file_type in ['xlsx', 'xls']:
             # For Excel files
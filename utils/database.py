@@ -3,6 +3,49 @@ import sqlite3
 import os
 from datetime import datetime
 
+def _create_transactions_table(cursor, table_name='transactions'):
+    """
+    Create a transactions table with the standard schema if it doesn't exist
+    
+    Parameters:
+        cursor (sqlite3.Cursor): Cursor on an open connection
+        table_name (str): Name of the table to create
+    """
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE,
+            description TEXT,
+            amount REAL,
+            source TEXT,
+            category TEXT,
+            original_category TEXT
+        )
+    ''')
+
+def _casefold(text):
+    """
+    Casefold a value for use as an SQL function; SQLite's own case folding is ASCII-only
+    
+    Parameters:
+        text (str or None): Value from the database
+    
+    Returns:
+        str or None: Casefolded text, or the value unchanged if it isn't a string
+    """
+    return text.casefold() if isinstance(text, str) else text
+
+def _create_transactions_indexes(cursor):
+    """
+    Create the indexes used by filtered transaction queries if they don't exist
+    
+    Parameters:
+        cursor (sqlite3.Cursor): Cursor on an open connection
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions(source)")
+
 def initialize_database(db_path='finance_data.db'):
     """
     Initialize the database with all necessary tables
@@ -17,18 +60,14 @@ def initialize_database(db_path='finance_data.db'):
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
+        # Keep the default rollback journal: every commit then lands in the database
+        # file itself, whose mtime the pages use as their cache key. This also
+        # switches back databases that an earlier version put into WAL mode.
+        cursor.execute("PRAGMA journal_mode=DELETE")
+        
         # Create transactions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE,
-                description TEXT,
-                amount REAL,
-                source TEXT,
-                category TEXT,
-                original_category TEXT
-            )
-        ''')
+        _create_transactions_table(cursor)
+        _create_transactions_indexes(cursor)
         
         # Create budget table
         cursor.execute('''
@@ -111,6 +150,21 @@ def check_db_exists(db_path='finance_data.db'):
     """
     return os.path.exists(db_path)
 
+def get_db_mtime(db_path='finance_data.db'):
+    """
+    Get the modification time of the SQLite database file
+    
+    The pages pass it as part of their cache keys, so cached queries are re-run
+    once the database file has changed.
+    
+    Parameters:
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        float or None: Modification time, or None if the database doesn't exist
+    """
+    return os.path.getmtime(db_path) if check_db_exists(db_path) else None
+
 def save_to_database(df, db_path='finance_data.db'):
     """
     Save transactions to SQLite database
@@ -129,31 +183,40 @@ def save_to_database(df, db_path='finance_data.db'):
         
         conn = sqlite3.connect(db_path)
         
-        # Convert date column to string for SQLite
-        df_copy = df.copy()
-        
-        # If the dataframe has an id column from previous database load, drop it
-        if 'id' in df_copy.columns:
-            df_copy = df_copy.drop(columns=['id'])
+        # If the dataframe has an id column from previous database load, drop it;
+        # drop() already returns a new frame, so the caller's frame is left untouched
+        if 'id' in df.columns:
+            df = df.drop(columns=['id'])
         
-        # Write to database
-        df_copy.to_sql('transactions', conn, if_exists='append', index=False)
+        # to_sql inserts all rows with one executemany; the connection context
+        # manager commits them together
+        with conn:
+            df.to_sql('transactions', conn, if_exists='append', index=False)
         
-        conn.commit()
         conn.close()
         return True
     except Exception as e:
         print(f"Error saving to database: {str(e)}")
         return False
 
-def load_from_database(db_path='finance_data.db', start_date=None, end_date=None):
+def load_from_database(db_path='finance_data.db', start_date=None, end_date=None,
+                       category=None, source=None, min_amount=None, max_amount=None, search=None,
+                       columns=None):
     """
-    Load transactions from SQLite database with optional date filtering
+    Load transactions from SQLite database with optional filtering
+    
+    All filters are applied in the SQL query, so only matching rows are read.
     
     Parameters:
         db_path (str): Path to the SQLite database
         start_date (str): Optional start date for filtering (YYYY-MM-DD)
         end_date (str): Optional end date for filtering (YYYY-MM-DD)
+        category (str): Optional category to match exactly
+        source (str): Optional source to match exactly
+        min_amount (float): Optional lower bound on amount
+        max_amount (float): Optional upper bound on amount
+        search (str): Optional case-insensitive substring of the description
+        columns (list): Optional list of columns to read; all columns if None
     
     Returns:
         pandas.DataFrame: DataFrame containing transactions
@@ -165,22 +228,55 @@ def load_from_database(db_path='finance_data.db', start_date=None, end_date=None
         return pd.DataFrame()
         
     try:
+        # Validate columns to prevent SQL injection
+        valid_columns = ['id', 'date', 'description', 'amount', 'source', 'category', 'original_category']
+        if columns is not None:
+            for column in columns:
+                if column not in valid_columns:
+                    raise ValueError(f"Invalid column: {column}")
+        
         conn = sqlite3.connect(db_path)
         
-        query = "SELECT * FROM transactions"
+        # Read only the requested columns so less data crosses from SQLite into pandas
+        select_list = ", ".join(columns) if columns else "*"
+        query = f"SELECT {select_list} FROM transactions"
+        conditions = []
         params = []
         
         if start_date:
-            query += " WHERE date >= ?"
+            conditions.append("date >= ?")
             params.append(start_date)
-            
-            if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
-        elif end_date:
-            query += " WHERE date <= ?"
+        
+        if end_date:
+            conditions.append("date <= ?")
             params.append(end_date)
         
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            params.append(min_amount)
+        
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            params.append(max_amount)
+        
+        if search:
+            # SQLite's LIKE and lower() only fold ASCII, so both sides are casefolded in
+            # Python; instr then matches the term literally, accents included
+            conn.create_function('casefold', 1, _casefold, deterministic=True)
+            conditions.append("instr(casefold(description), ?) > 0")
+            params.append(search.casefold())
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
         df = pd.read_sql_query(query, conn, params=params)
         
         # Convert date column to datetime with flexible parsing
@@ -313,6 +409,79 @@ def update_transaction(transaction_id, field, value, db_path='finance_data.db'):
         print(f"Error updating transaction: {str(e)}")
         return False
 
+def update_transaction_fields(transaction_id, fields, db_path='finance_data.db'):
+    """
+    Update several fields of a transaction with a single UPDATE statement
+    
+    Parameters:
+        transaction_id (int): ID of the transaction to update
+        fields (dict): Mapping of field name to new value, containing only the changed fields
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not check_db_exists(db_path):
+        return False
+    
+    # Nothing changed, so there is nothing to write
+    if not fields:
+        return True
+    
+    try:
+        # Validate fields to prevent SQL injection
+        valid_fields = ['date', 'description', 'amount', 'source', 'category', 'original_category']
+        for field in fields:
+            if field not in valid_fields:
+                raise ValueError(f"Invalid field: {field}")
+        
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # Build one SET clause for all changed fields so the row is written in a single commit
+        set_clause = ", ".join(f"{field} = ?" for field in fields)
+        query = f"UPDATE transactions SET {set_clause} WHERE id = ?"
+        cursor.execute(query, (*fields.values(), transaction_id))
+        
+        conn.commit()
+        conn.close()
+        
+        return True
+    except Exception as e:
+        print(f"Error updating transaction: {str(e)}")
+        return False
+
+def bulk_update_category(transaction_ids, category, db_path='finance_data.db'):
+    """
+    Set the category of many transactions in a single database transaction
+    
+    Parameters:
+        transaction_ids (list): IDs of the transactions to update
+        category (str): New category for all of them
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not check_db_exists(db_path):
+        return False
+    
+    try:
+        conn = sqlite3.connect(db_path)
+        
+        # One commit for the whole batch instead of one per row
+        with conn:
+            conn.executemany(
+                "UPDATE transactions SET category = ? WHERE id = ?",
+                [(category, int(transaction_id)) for transaction_id in transaction_ids]
+            )
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error updating transactions: {str(e)}")
+        return False
+
 def get_date_range(db_path='finance_data.db'):
     """
     Get the earliest and latest dates in the database
@@ -456,6 +625,33 @@ def get_budget_months(db_path='finance_data.db'):
         print(f"Error getting budget months: {str(e)}")
         return []
         
+def delete_budget(month, db_path='finance_data.db'):
+    """
+    Delete the budget for a specific month
+    
+    Parameters:
+        month (str): Month in YYYY-MM format
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not check_db_exists(db_path):
+        return False
+    
+    try:
+        conn = sqlite3.connect(db_path)
+        
+        # The connection context manager commits on success and rolls back on error
+        with conn:
+            conn.execute("DELETE FROM budgets WHERE month = ?", (month,))
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error deleting budget: {str(e)}")
+        return False
+
 def get_categories(db_path='finance_data.db'):
     """
     Get list of all categories from the database
@@ -482,6 +678,61 @@ def get_categories(db_path='finance_data.db'):
         print(f"Error getting categories: {str(e)}")
         return pd.DataFrame()
 
+def get_category_counts(db_path='finance_data.db'):
+    """
+    Count transactions per category in the database
+    
+    Parameters:
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        pandas.Series: Transaction counts indexed by category, largest first;
+            transactions without a category are counted as 'Uncategorized'
+    """
+    if not check_db_exists(db_path):
+        return pd.Series(dtype='int64')
+    
+    try:
+        conn = sqlite3.connect(db_path)
+        
+        # Group in SQLite so only one row per category reaches pandas; every row is
+        # counted, with a missing category reported as Uncategorized
+        query = """
+            SELECT COALESCE(category, 'Uncategorized') AS category, COUNT(*) AS count
+            FROM transactions
+            GROUP BY 1
+            ORDER BY count DESC
+        """
+        counts_df = pd.read_sql_query(query, conn)
+        
+        conn.close()
+        return counts_df.set_index('category')['count']
+    except Exception as e:
+        print(f"Error counting categories: {str(e)}")
+        return pd.Series(dtype='int64')
+
+def get_transaction_count(db_path='finance_data.db'):
+    """
+    Count the transactions in the database without loading them
+    
+    Parameters:
+        db_path (str): Path to the SQLite database
+    
+    Returns:
+        int: Number of transactions, 0 if the database or table is missing
+    """
+    if not check_db_exists(db_path):
+        return 0
+    
+    try:
+        conn = sqlite3.connect(db_path)
+        count = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        conn.close()
+        return count
+    except Exception as e:
+        print(f"Error counting transactions: {str(e)}")
+        return 0
+
 def reindex_transactions_by_date(db_path='finance_data.db'):
     """
     Reindex all transactions by date, assigning IDs sequentially from 1
@@ -500,34 +751,34 @@ def reindex_transactions_by_date(db_path='finance_data.db'):
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Begin transaction
-        cursor.execute("BEGIN TRANSACTION")
+        # Take an exclusive lock so nothing writes while the table is swapped
+        cursor.execute("BEGIN EXCLUSIVE")
         
-        # Create a temporary table to store transactions ordered by date
+        # Build a fresh table in date order - SQLite assigns new sequential IDs from 1
+        cursor.execute("DROP TABLE IF EXISTS transactions_reindexed")
+        _create_transactions_table(cursor, 'transactions_reindexed')
         cursor.execute("""
-            CREATE TEMPORARY TABLE temp_transactions AS 
-            SELECT * FROM transactions ORDER BY date ASC
-        """)
-        
-        # Delete all from main table
-        cursor.execute("DELETE FROM transactions")
-        
-        # Reset the auto-increment counter
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name='transactions'")
-        
-        # Copy back from temp table - SQLite will assign new sequential IDs
-        cursor.execute("""
-            INSERT INTO transactions (date, description, amount, source, category, original_category)
+            INSERT INTO transactions_reindexed (date, description, amount, source, category, original_category)
             SELECT date, description, amount, source, category, original_category 
-            FROM temp_transactions
-            ORDER BY date ASC
+            FROM transactions
+            ORDER BY date ASC, id ASC
         """)
         
-        # Drop temporary table
-        cursor.execute("DROP TABLE temp_transactions")
+        # Swap the new table in place of the old one; the rename carries its
+        # auto-increment counter over to 'transactions'
+        cursor.execute("DROP TABLE transactions")
+        cursor.execute("ALTER TABLE transactions_reindexed RENAME TO transactions")
+        _create_transactions_indexes(cursor)
         
         # Commit all changes
         cursor.execute("COMMIT")
+        
+        # Reclaim the pages freed by the dropped table. The reindex is already committed,
+        # so a failed VACUUM (e.g. another connection reading) is only logged
+        try:
+            cursor.execute("VACUUM")
+        except sqlite3.Error as e:
+            print(f"Skipped VACUUM after reindexing: {str(e)}")
         conn.close()
         
         return True
@@ -0,0 +1,16 @@
+import streamlit as st
+
+def show_message(key):
+    """
+    Show, then forget, a status message left behind by a write callback
+    
+    Callbacks store the message in session state as a (level, text) tuple, where
+    level names a Streamlit status element such as 'success' or 'error'.
+    
+    Parameters:
+        key (str): Session state key the message was stored under
+    """
+    message = st.session_state.pop(key, None)
+    if message:
+        level, text = message
+        getattr(st, level)(text)